@@ -19,15 +19,61 @@ def create_app():
     # Load configurations from the Config class
     app.config.from_object(Config)
 
+    # Take the client IP from X-Forwarded-For, but only from the number of proxies configured as trusted
+    if app.config['PROXY_FIX_X_FOR']:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+
+    # Pick the pool class/options for the configured database, then hook pool metrics
+    # and per-request SQL instrumentation onto the engine
+    from app.utils.pool_metrics import configure_engine_options, init_pool_metrics
+    from app.utils.sql_instrumentation import init_sql_instrumentation
+    configure_engine_options(app)
+
     # Initialize extensions with the app instance
     db.init_app(app)
     jwt.init_app(app)
-
-    # Import the auth, sitcom, character, and review blueprints
+    with app.app_context():
+        init_pool_metrics(app, db.engine)
+        init_sql_instrumentation(app, db.engine)
+        # Deleting a sitcom relies on ON DELETE CASCADE, which SQLite only enforces when asked to
+        from app.utils.purge import enable_foreign_keys
+        enable_foreign_keys(db.engine)
+
+    # Install the configured JSON provider (orjson when available)
+    from app.utils.json_provider import init_json_provider
+    init_json_provider(app)
+
+    # Compress responses the client accepts compressed (runs after the view, so cached bodies stay uncompressed)
+    from app.utils.compression import init_compression
+    init_compression(app)
+
+    # Set up the response cache backend (imported here because it depends on db)
+    from app.utils.cache import cache
+    cache.init_app(app)
+
+    # Set up the bounded password hashing pool
+    from app.utils.hashing import password_hasher
+    password_hasher.init_app(app)
+
+    # Shed load before it reaches the database: per-class concurrency limits and per-endpoint rate limits
+    from app.utils.admission import init_admission
+    init_admission(app)
+
+    # Set up the background purge of large sitcoms
+    from app.utils.purge import purger
+    purger.init_app(app)
+
+    # Import the auth, sitcom, character, review, stats, changes, search, export, and metrics blueprints
     from app.routes.auth_routes import auth_bp
     from app.routes.sitcom_routes import sitcom_bp
     from app.routes.character_routes import character_bp
     from app.routes.review_routes import review_bp
+    from app.routes.stats_routes import stats_bp
+    from app.routes.changes_routes import changes_bp
+    from app.routes.search_routes import search_bp
+    from app.routes.export_routes import export_bp
+    from app.routes.metrics_routes import metrics_bp
 
 
     # Register the blueprints with a URL prefix
@@ -35,6 +81,15 @@ def create_app():
     app.register_blueprint(sitcom_bp, url_prefix='/api')
     app.register_blueprint(character_bp, url_prefix='/api')
     app.register_blueprint(review_bp, url_prefix='/api')
+    app.register_blueprint(stats_bp, url_prefix='/api')
+    app.register_blueprint(changes_bp, url_prefix='/api')
+    app.register_blueprint(search_bp, url_prefix='/api')
+    app.register_blueprint(export_bp, url_prefix='/api')
+    app.register_blueprint(metrics_bp, url_prefix='/internal')
+
+    # Register the custom CLI commands (e.g., flask recompute-ratings)
+    from app.commands import register_commands
+    register_commands(app)
 
     @app.errorhandler(400)
     def bad_request(error):
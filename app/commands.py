@@ -0,0 +1,215 @@
+# app/commands.py
+import click
+from app import db
+
+
+def register_commands(app):
+    """
+    Registers the custom 'flask' CLI commands on the application
+    """
+
+    @app.cli.command('init-db')
+    def init_db():
+        """
+        Creates the database tables, indexes and full-text search structures that do not exist yet
+        """
+        # Import every model so its table is part of the metadata
+        from app.models.user import User
+        from app.models.sitcom import Sitcom
+        from app.models.character import Character
+        from app.models.review import Review
+        from app.models.sitcom_stats import SitcomStats, SitcomMonthlyRating
+        from app.models.sitcom_purge import SitcomPurge
+        from app.models.change_log import ChangeLog, ChangeLogCompaction
+
+        try:
+            db.create_all()
+            click.echo("Database schema is ready")
+        except Exception as e:
+            raise click.ClickException(f"Error creating the database schema: {e}")
+
+    @app.cli.command('create-indexes')
+    def create_indexes():
+        """
+        Creates the indexes declared on the models that an existing database does not have yet
+        """
+        from app.models.user import User
+        from app.models.sitcom import Sitcom
+        from app.models.character import Character
+        from app.models.review import Review
+        from app.models.sitcom_stats import SitcomStats, SitcomMonthlyRating
+        from app.models.sitcom_purge import SitcomPurge
+        from app.models.change_log import ChangeLog, ChangeLogCompaction
+
+        try:
+            created = []
+            for table in db.metadata.sorted_tables:
+                for index in table.indexes:
+                    if not any(existing['name'] == index.name for existing in db.inspect(db.engine).get_indexes(table.name)):
+                        index.create(db.engine)
+                        created.append(index.name)
+            click.echo(f"Created indexes: {', '.join(created)}" if created else "Every index is already in place")
+        except Exception as e:
+            raise click.ClickException(f"Error creating indexes: {e}")
+
+    @app.cli.command('check-query-plans')
+    def check_query_plans():
+        """
+        EXPLAINs the statements of each hot read path and fails when one of them falls back to a full table scan
+        Run it against a seeded database: the planner picks scans for near-empty tables
+        """
+        from app.utils.query_plans import HOT_PATHS, PlanCheckError, check_query_plans
+
+        try:
+            violations = check_query_plans(app)
+        except PlanCheckError as e:
+            raise click.ClickException(str(e))
+        for name, table, detail in violations:
+            click.echo(f"FULL SCAN  {name}: {table}: {detail}", err=True)
+        if violations:
+            raise click.ClickException(f"{len(violations)} full scans on hot paths")
+        click.echo(f"All {len(HOT_PATHS)} hot paths use indexes")
+
+    @app.cli.command('recompute-ratings')
+    def recompute_ratings():
+        """
+        Rebuilds rating_count and rating_sum for every sitcom from the reviews table
+        """
+        from app.models.sitcom import Sitcom
+
+        try:
+            updated = Sitcom.recompute_ratings()
+            db.session.commit()
+            click.echo(f"Recomputed rating aggregates for {updated} sitcoms")
+        except Exception as e:
+            db.session.rollback()
+            raise click.ClickException(f"Error recomputing ratings: {e}")
+
+    @app.cli.command('recompute-stats')
+    def recompute_stats():
+        """
+        Rebuilds the review histograms and monthly rating buckets from the reviews table
+        """
+        from app.models.sitcom_stats import SitcomStats
+
+        try:
+            updated = SitcomStats.recompute()
+            db.session.commit()
+            click.echo(f"Recomputed review statistics for {updated} sitcoms")
+        except Exception as e:
+            db.session.rollback()
+            raise click.ClickException(f"Error recomputing review statistics: {e}")
+
+    @app.cli.command('add-delete-cascades')
+    def add_delete_cascades():
+        """
+        Adds ON DELETE CASCADE to the sitcom foreign keys of characters and reviews on an existing MySQL
+        or PostgreSQL database
+        """
+        from app.utils.purge import ALTER_FOREIGN_KEY, add_delete_cascades
+
+        dialect = db.engine.dialect.name
+        if dialect not in ALTER_FOREIGN_KEY:
+            # SQLite cannot alter a foreign key; tables created by this version already cascade
+            click.echo(f"Skipped: {dialect} cannot change foreign keys in place. Tables created by this version "
+                       "already cascade; recreate older ones with 'flask init-db' on a new database")
+            return
+        try:
+            changed = add_delete_cascades()
+            db.session.commit()
+            click.echo(f"Added ON DELETE CASCADE to: {', '.join(changed)}" if changed else "The cascades are already in place")
+        except Exception as e:
+            db.session.rollback()
+            raise click.ClickException(f"Error adding the delete cascades: {e}")
+
+    @app.cli.command('purge-sitcoms')
+    @click.option('--chunk-size', type=int, default=None, help='Rows deleted per transaction')
+    def purge_sitcoms(chunk_size):
+        """
+        Finishes the background sitcom deletions that were accepted but interrupted (e.g., by a restart)
+        """
+        from app.utils.purge import pending_purges, purge_sitcom
+
+        try:
+            sitcom_ids = pending_purges()
+            for sitcom_id in sitcom_ids:
+                purge_sitcom(sitcom_id, chunk_size or app.config['PURGE_CHUNK_SIZE'])
+            click.echo(f"Purged {len(sitcom_ids)} sitcoms")
+        except Exception as e:
+            db.session.rollback()
+            raise click.ClickException(f"Error purging sitcoms: {e}")
+
+    @app.cli.command('compact-changes')
+    @click.option('--tombstone-days', type=int, default=None, help='Keep delete events this many days')
+    @click.option('--chunk-size', type=int, default=1000, help='Events deleted per transaction')
+    def compact_changes(tombstone_days, chunk_size):
+        """
+        Drops superseded change feed events and expired tombstones
+        """
+        from app.models.change_log import ChangeLog
+
+        if tombstone_days is None:
+            tombstone_days = app.config['CHANGES_TOMBSTONE_DAYS']
+        try:
+            removed = ChangeLog.compact(tombstone_days, chunk_size)
+            click.echo(f"Removed {removed} change events; feed horizon is now {ChangeLog.horizon()}")
+        except Exception as e:
+            db.session.rollback()
+            raise click.ClickException(f"Error compacting the change log: {e}")
+
+    @app.cli.command('create-search-index')
+    def create_search_index():
+        """
+        Creates the full-text search indexes on an existing database and builds them
+        """
+        from app.utils.search import create_search_indexes
+
+        try:
+            create_search_indexes()
+            click.echo("Full-text search indexes are ready")
+        except Exception as e:
+            db.session.rollback()
+            raise click.ClickException(f"Error creating search indexes: {e}")
+
+    @app.cli.command('export')
+    @click.option('--format', 'export_format', type=click.Choice(['ndjson', 'csv']), default='ndjson', help='Output format')
+    @click.option('--output', type=click.File('w'), default='-', help='Output file (defaults to stdout)')
+    @click.option('--batch-size', type=int, default=None, help='Rows per server-side cursor batch')
+    def export(export_format, output, batch_size):
+        """
+        Streams every sitcom, character and review as NDJSON or CSV
+        """
+        from app.utils.export import iter_export
+
+        for chunk in iter_export(export_format, batch_size or app.config['EXPORT_BATCH_SIZE']):
+            output.write(chunk)
+
+    @app.cli.command('seed')
+    @click.option('--users', type=int, default=1000, help='Users to create (owners and reviewers)')
+    @click.option('--sitcoms', type=int, default=1000, help='Sitcoms to create')
+    @click.option('--characters-per-sitcom', type=int, default=10, help='Average characters per sitcom')
+    @click.option('--reviews-per-sitcom', type=int, default=20, help='Average reviews per sitcom (capped at --users)')
+    @click.option('--seed', 'random_seed', type=int, default=42, help='Random seed; the same seed produces the same data')
+    @click.option('--batch-size', type=int, default=1000, help='Sitcoms (with their characters and reviews) per transaction')
+    @click.option('--password', default='password', help='Password of every seeded user')
+    def seed(users, sitcoms, characters_per_sitcom, reviews_per_sitcom, random_seed, batch_size, password):
+        """
+        Generates synthetic users, sitcoms, characters and reviews with bulk multi-row INSERTs
+        """
+        import time
+        from app.utils.seed import seed_catalog
+
+        started = time.perf_counter()
+
+        def progress(counts):
+            rows = sum(counts.values())
+            click.echo(f"{counts['users']} users, {counts['sitcoms']} sitcoms, {counts['characters']} characters, "
+                       f"{counts['reviews']} reviews ({rows / (time.perf_counter() - started):.0f} rows/s)", err=True)
+
+        try:
+            counts = seed_catalog(users, sitcoms, characters_per_sitcom, reviews_per_sitcom,
+                                  seed=random_seed, batch_size=batch_size, password=password, progress=progress)
+        except Exception as e:
+            db.session.rollback()
+            raise click.ClickException(f"Error seeding the database: {e}")
+        click.echo(f"Seeded {sum(counts.values())} rows in {time.perf_counter() - started:.1f}s")
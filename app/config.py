@@ -11,6 +11,119 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False # Suppress Warnings
 
+    # Connection pool settings (pool_size, max_overflow and pool_timeout are dropped for in-memory SQLite)
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv("DB_POOL_SIZE", 10)),
+        'max_overflow': int(os.getenv("DB_MAX_OVERFLOW", 20)),
+        'pool_recycle': int(os.getenv("DB_POOL_RECYCLE", 1800)), # seconds; keep below MySQL's wait_timeout
+        'pool_pre_ping': os.getenv("DB_POOL_PRE_PING", "true").lower() in ('1', 'true', 'yes'),
+        'pool_timeout': float(os.getenv("DB_POOL_TIMEOUT", 30)) # seconds to wait for a free connection
+    }
+
     #JWT configuration
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
-    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
\ No newline at end of file
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
+
+    # Keyset pagination for list endpoints (?limit=&cursor=)
+    PAGINATION_DEFAULT_LIMIT = int(os.getenv("PAGINATION_DEFAULT_LIMIT", 50))
+    PAGINATION_MAX_LIMIT = int(os.getenv("PAGINATION_MAX_LIMIT", 200))
+
+    # Rows fetched per server-side cursor batch by the catalog export
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+    # Most characters/reviews embedded per sitcom by ?include= (the full lists are paginated endpoints)
+    INCLUDE_MAX_ITEMS = int(os.getenv("INCLUDE_MAX_ITEMS", 10))
+
+    # Multi-get endpoints (?ids=1,2,3): most distinct IDs resolved per request
+    MULTI_GET_MAX_IDS = int(os.getenv("MULTI_GET_MAX_IDS", 200))
+
+    # Review statistics: virtual reviews at the catalog mean added to every sitcom's weighted rating,
+    # calendar months in the trend window, and sitcoms listed in the catalog top chart
+    STATS_PRIOR_WEIGHT = int(os.getenv("STATS_PRIOR_WEIGHT", 10))
+    STATS_TREND_MONTHS = int(os.getenv("STATS_TREND_MONTHS", 6))
+    STATS_TOP_LIMIT = int(os.getenv("STATS_TOP_LIMIT", 10))
+    # Seconds a worker reuses the catalog mean (the prior of per-sitcom weighted ratings) before recomputing it
+    STATS_PRIOR_TTL = int(os.getenv("STATS_PRIOR_TTL", 300))
+
+    # Sitcoms with more characters + reviews than this are deleted by a background purge (202 Accepted),
+    # PURGE_CHUNK_SIZE rows per transaction; 0 always deletes within the request
+    PURGE_ASYNC_THRESHOLD = int(os.getenv("PURGE_ASYNC_THRESHOLD", 10000))
+    PURGE_CHUNK_SIZE = int(os.getenv("PURGE_CHUNK_SIZE", 1000))
+    # Seconds a worker reuses its list of sitcoms being purged (hidden from reads and writes) before reloading it
+    PURGE_PENDING_TTL = int(os.getenv("PURGE_PENDING_TTL", 5))
+
+    # Change feed (/api/changes): seconds an event is held back so slower concurrent transactions can commit
+    # the lower cursors first (keep it above the longest write transaction plus replica lag and clock skew;
+    # a later commit is missed by consumers already past its cursor), and days tombstones are kept by 'flask compact-changes'
+    CHANGES_SETTLE_SECONDS = int(os.getenv("CHANGES_SETTLE_SECONDS", 5))
+    CHANGES_TOMBSTONE_DAYS = int(os.getenv("CHANGES_TOMBSTONE_DAYS", 30))
+
+    # Bulk create endpoints: maximum items per request and rows per multi-row INSERT
+    BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", 5000))
+    BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", 500))
+
+    # JSON encoder: 'auto' (orjson when installed, else the stdlib), 'orjson', 'stdlib' or a 'module:Class' provider
+    JSON_PROVIDER = os.getenv("JSON_PROVIDER", "auto")
+
+    # Response compression: codings in server preference order ('br' and 'zstd' need the brotli / zstandard
+    # packages), the smallest buffered body worth compressing, per-coding levels and the compressible types
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "true").lower() in ('1', 'true', 'yes')
+    COMPRESS_ALGORITHMS = os.getenv("COMPRESS_ALGORITHMS", "zstd,br,gzip")
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 500)) # bytes
+    COMPRESS_LEVEL_GZIP = int(os.getenv("COMPRESS_LEVEL_GZIP", 6))
+    COMPRESS_LEVEL_BR = int(os.getenv("COMPRESS_LEVEL_BR", 4))
+    COMPRESS_LEVEL_ZSTD = int(os.getenv("COMPRESS_LEVEL_ZSTD", 3))
+    COMPRESS_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html')
+
+    # Response cache for public GET endpoints: 'memory' (per-process LRU), 'null', or a 'module:Class' backend
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 1024))
+    CACHE_TTL = int(os.getenv("CACHE_TTL", 60)) # seconds
+
+    # Password hashing: Werkzeug method and cost, worker processes (0 = hash on the request thread),
+    # extra requests allowed to wait for a worker before answering 503, and the per-hash timeout
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_QUEUE_DEPTH = int(os.getenv("PASSWORD_HASH_QUEUE_DEPTH", 16))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", 10)) # seconds
+
+    # Per-request SQL instrumentation (Server-Timing header + 'sitcomverse.sql' log) and the opt-in N+1 detector:
+    # a threshold of 0 disables detection; SQL_N_PLUS_ONE_RAISE turns the warning into an error
+    SQL_INSTRUMENTATION = os.getenv("SQL_INSTRUMENTATION", "true").lower() in ('1', 'true', 'yes')
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", 0))
+    SQL_N_PLUS_ONE_RAISE = os.getenv("SQL_N_PLUS_ONE_RAISE", "false").lower() in ('1', 'true', 'yes')
+
+    # Admission control: concurrent requests per worker process for each route class (0 = unlimited).
+    # The defaults stay below GUNICORN_THREADS so cheap routes such as '/' keep a free thread when the database
+    # is slow; excess requests wait up to ADMISSION_QUEUE_TIMEOUT seconds in a queue of ADMISSION_QUEUE_DEPTH
+    # per class, then get 503 with Retry-After
+    ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in ('1', 'true', 'yes')
+    _gunicorn_threads = int(os.getenv("GUNICORN_THREADS", 4)) # Not a setting: only sizes the defaults below
+    ADMISSION_READ_LIMIT = int(os.getenv("ADMISSION_READ_LIMIT", max(_gunicorn_threads - 1, 1)))
+    ADMISSION_WRITE_LIMIT = int(os.getenv("ADMISSION_WRITE_LIMIT", max(_gunicorn_threads // 2, 1)))
+    ADMISSION_AUTH_LIMIT = int(os.getenv("ADMISSION_AUTH_LIMIT", max(_gunicorn_threads // 2, 1)))
+    ADMISSION_QUEUE_DEPTH = int(os.getenv("ADMISSION_QUEUE_DEPTH", 8))
+    ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", 0.5)) # seconds
+    ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", 1)) # seconds
+
+    # Token bucket rate limits keyed on the JWT identity (or the client IP): 'endpoint=requests/seconds' pairs
+    # (e.g. 'auth.login_user=10/60'), an optional default for every other endpoint, and the bucket store
+    # ('memory' or 'module:Class'). Off by default: behind a proxy every client shares the proxy's IP until
+    # PROXY_FIX_X_FOR is set
+    RATE_LIMITS = os.getenv("RATE_LIMITS", "")
+    RATE_LIMIT_DEFAULT = os.getenv("RATE_LIMIT_DEFAULT", "")
+    RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "memory")
+    RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 10000))
+
+    # Proxies in front of the app (e.g. a load balancer, then nginx) that append to X-Forwarded-For; the client IP
+    # is read from that many hops back. 0 trusts no header: set it only when every request comes through them
+    PROXY_FIX_X_FOR = int(os.getenv("PROXY_FIX_X_FOR", 0))
+
+    # /internal/metrics: off by default (404). When enabled, a request needs 'Authorization: Bearer <METRICS_TOKEN>'
+    # or a client IP listed in METRICS_ALLOWED_IPS (comma-separated); with neither set, every request is refused
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ('1', 'true', 'yes')
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+    METRICS_ALLOWED_IPS = os.getenv("METRICS_ALLOWED_IPS", "")
+
+    # Pool connections each worker opens during warm-up (wsgi.py), before it accepts traffic
+    WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", 4))
\ No newline at end of file
@@ -0,0 +1,178 @@
+# app/models/change_log.py
+from app import db
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, func, insert, literal, select
+from app.models.character import Character
+from app.models.review import Review
+from app.models.sitcom import Sitcom
+
+
+def _utc_now():
+    """
+    Naive UTC timestamp, the form DateTime columns are stored and compared in
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class ChangeLog(db.Model):
+    """
+    Append-only log of sitcom, character and review writes, read by the change feed (GET /api/changes)
+    This model defines the 'change_log' table; routes add their events in the same transaction as the write,
+    so an event exists exactly when its change was committed. The id is the feed cursor
+    """
+    __tablename__ = 'change_log'
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    entity = db.Column(db.String(20), nullable=False) # 'sitcom', 'character' or 'review'
+    entity_id = db.Column(db.Integer, nullable=False)
+    # The sitcom the entity belongs to (its own id for sitcoms); no foreign key, tombstones outlive the rows
+    sitcom_id = db.Column(db.Integer, nullable=False)
+    action = db.Column(db.String(10), nullable=False) # 'create', 'update' or 'delete' (a tombstone)
+    changed_at = db.Column(db.DateTime, nullable=False, default=_utc_now)
+
+    # Backs compaction, which keeps only the newest event of each entity
+    __table_args__ = (db.Index('ix_change_log_entity_entity_id_id', 'entity', 'entity_id', 'id'),)
+
+    # Entity name -> model
+    ENTITIES = {'sitcom': Sitcom, 'character': Character, 'review': Review}
+
+    def __repr__(self):
+        """
+        String representation of the ChangeLog object
+        """
+        return f'<ChangeLog {self.id}: {self.action} {self.entity} {self.entity_id}>'
+
+    @staticmethod
+    def record(entity, entity_id, action, sitcom_id=None):
+        """
+        Adds one event to the current transaction; sitcom_id defaults to entity_id (for sitcom events)
+        """
+        db.session.add(ChangeLog(entity=entity, entity_id=entity_id, action=action,
+                                 sitcom_id=entity_id if sitcom_id is None else sitcom_id))
+
+    @staticmethod
+    def record_many(entity, action, pairs):
+        """
+        Adds one event per (entity_id, sitcom_id) pair with a single multi-row INSERT
+        """
+        changed_at = _utc_now()
+        rows = [{'entity': entity, 'entity_id': entity_id, 'sitcom_id': sitcom_id, 'action': action,
+                 'changed_at': changed_at} for entity_id, sitcom_id in pairs]
+        if rows:
+            db.session.execute(insert(ChangeLog), rows)
+
+    @staticmethod
+    def last_id(entity):
+        """
+        Highest id of an entity's table; read before a bulk insert and passed to record_inserted()
+        """
+        model = ChangeLog.ENTITIES[entity]
+        return db.session.scalar(select(func.coalesce(func.max(model.id), 0)))
+
+    @staticmethod
+    def record_inserted(entity, after_id, *criteria):
+        """
+        Adds a 'create' event for every row of the entity's table with an id above 'after_id' matching 'criteria'
+        Runs as one INSERT ... SELECT, so bulk inserts are logged without their ids (MySQL cannot return them);
+        the criteria should narrow the rows to the ones the transaction could have inserted
+        """
+        model = ChangeLog.ENTITIES[entity]
+        sitcom_column = model.id if model is Sitcom else model.sitcom_id
+        rows = select(literal(entity), model.id, sitcom_column, literal('create'), literal(_utc_now())) \
+            .where(model.id > after_id, *criteria).order_by(model.id)
+        db.session.execute(insert(ChangeLog.__table__).from_select(
+            ['entity', 'entity_id', 'sitcom_id', 'action', 'changed_at'], rows
+        ))
+
+    @staticmethod
+    def read(since, limit, settle_seconds):
+        """
+        Up to 'limit' events after cursor 'since', oldest first
+        Events younger than 'settle_seconds' are held back: a transaction that took a lower id may not have
+        committed yet, and serving a higher id first would make the consumer skip it for good
+        The window is a heuristic, not a guarantee: changed_at is stamped by the writing worker's clock when the
+        event is flushed, so an event is still skipped by consumers that moved past its id when its transaction
+        commits (or reaches the replica this feed reads) more than 'settle_seconds' later, or when the workers'
+        clocks drift apart by more than that. Keep settle_seconds above the longest write transaction plus
+        replication lag and clock skew
+        """
+        settled = _utc_now() - timedelta(seconds=settle_seconds)
+        return db.session.scalars(
+            select(ChangeLog).where(ChangeLog.id > since, ChangeLog.changed_at <= settled)
+            .order_by(ChangeLog.id).limit(limit)
+        ).all()
+
+    @staticmethod
+    def horizon():
+        """
+        Highest cursor whose tombstones compaction has dropped (0 when none); a consumer that synced
+        before it may still hold deleted rows and has to start over
+        Every compaction stores a horizon at least as high as the previous one, so the latest run has it
+        """
+        return db.session.scalar(
+            select(ChangeLogCompaction.horizon).order_by(ChangeLogCompaction.id.desc()).limit(1)
+        ) or 0
+
+    @staticmethod
+    def compact(tombstone_days, chunk_size=1000):
+        """
+        Shrinks the log without changing what a consumer ends up with:
+        - drops every event superseded by a newer event of the same entity
+        - drops the character and review events that precede the tombstone of their sitcom (it covers them)
+        - drops tombstones older than 'tombstone_days', moving the horizon past them
+        Deletes in chunks of 'chunk_size' ids, one transaction each; returns the number of events removed
+        """
+        newest = select(ChangeLog.entity, ChangeLog.entity_id, func.max(ChangeLog.id).label('newest_id')) \
+            .group_by(ChangeLog.entity, ChangeLog.entity_id).subquery()
+        superseded = select(ChangeLog.id).join(newest, (ChangeLog.entity == newest.c.entity) & (
+            ChangeLog.entity_id == newest.c.entity_id)).where(ChangeLog.id < newest.c.newest_id)
+
+        tombstones = select(ChangeLog.entity_id.label('sitcom_id'), ChangeLog.id.label('tombstone_id')) \
+            .where(ChangeLog.entity == 'sitcom', ChangeLog.action == 'delete').subquery()
+        covered = select(ChangeLog.id).join(tombstones, ChangeLog.sitcom_id == tombstones.c.sitcom_id) \
+            .where(ChangeLog.entity != 'sitcom', ChangeLog.id < tombstones.c.tombstone_id)
+
+        removed = ChangeLog._delete_ids(superseded, chunk_size) + ChangeLog._delete_ids(covered, chunk_size)
+
+        cutoff = _utc_now() - timedelta(days=tombstone_days)
+        expired = select(ChangeLog.id).where(ChangeLog.action == 'delete', ChangeLog.changed_at < cutoff)
+        horizon = db.session.scalar(select(func.max(ChangeLog.id)).where(ChangeLog.action == 'delete',
+                                                                         ChangeLog.changed_at < cutoff))
+        removed += ChangeLog._delete_ids(expired, chunk_size)
+        db.session.add(ChangeLogCompaction(horizon=horizon or ChangeLog.horizon(), removed=removed))
+        db.session.commit()
+        return removed
+
+    @staticmethod
+    def _delete_ids(statement, chunk_size):
+        """
+        Deletes the change log rows whose ids 'statement' selects, 'chunk_size' per transaction
+        """
+        removed = 0
+        while True:
+            ids = db.session.scalars(statement.order_by(ChangeLog.id).limit(chunk_size)).all()
+            if not ids:
+                return removed
+            db.session.execute(delete(ChangeLog).where(ChangeLog.id.in_(ids)))
+            db.session.commit()
+            removed += len(ids)
+
+
+class ChangeLogCompaction(db.Model):
+    """
+    One run of the change log compaction and the horizon it left behind
+    This model defines the 'change_log_compactions' table
+    """
+    __tablename__ = 'change_log_compactions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Highest cursor among the tombstones dropped so far
+    horizon = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), nullable=False, default=0)
+    removed = db.Column(db.Integer, nullable=False, default=0)
+    compacted_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        """
+        String representation of the ChangeLogCompaction object
+        """
+        return f'<ChangeLogCompaction {self.id}: horizon {self.horizon}>'
@@ -1,6 +1,7 @@
 # app/models/character.py
 from app import db
 from datetime import datetime, timezone
+from app.utils.fields import serialize
 
 
 class Character(db.Model):
@@ -16,12 +17,25 @@ class Character(db.Model):
     actor = db.Column(db.String(255))
     role = db.Column(db.String(100)) # e.g, "Lead", "Supporting", "Recurring", "Character", "Background", "Cameo"
     description = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
-    # Foreign key to link to the Sitcom this character belongs to
-    sitcom_id = db.Column(db.Integer, db.ForeignKey('sitcoms.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    # Row version, bumped on every update; used (with updated_at) to build ETags
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    # Foreign key to link to the Sitcom this character belongs to; the database deletes characters with their sitcom
+    sitcom_id = db.Column(db.Integer, db.ForeignKey('sitcoms.id', ondelete='CASCADE'), nullable=False)
     # Define the relationship to the Sitcom model
-    sitcom = db.Relationship('Sitcom', backref=db.backref('characters', lazy=True))
+    # passive_deletes leaves unloaded characters to ON DELETE CASCADE instead of loading them to delete one by one
+    sitcom = db.Relationship('Sitcom', backref=db.backref('characters', lazy=True, cascade='all, delete-orphan',
+                                                          passive_deletes=True))
+
+    # Composite index backing the paginated character list of a sitcom (seek on sitcom_id, id)
+    __table_args__ = (db.Index('ix_characters_sitcom_id_id', 'sitcom_id', 'id'),)
+
+    # Let the ORM increment 'version' on every flushed update
+    __mapper_args__ = {'version_id_col': version}
+
+    # Fields of the API representation (selectable with ?fields=)
+    FIELDS = ('id', 'name', 'actor', 'role', 'description', 'sitcom_id', 'created_at', 'updated_at')
 
     def __repr__(self):
         """
@@ -30,18 +44,9 @@ class Character(db.Model):
         return f'<Character {self.name} from Sitcom ID {self.sitcom_id}>'
     
 
-    def to_dict(self):
+    def to_dict(self, fields=None):
         """
         Converts the Character object to a dictionary, excluding sensitive information
-        Returns user data useful in API responses
+        Returns user data useful in API responses; 'fields' limits it to a sparse fieldset
         """
-        return {
-            'id': self.id,
-            'name': self.name,
-            'actor': self.actor,
-            'role': self.role,
-            'description': self.description,
-            'sitcom_id': self.sitcom_id,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+        return serialize(self, fields or self.FIELDS)
\ No newline at end of file
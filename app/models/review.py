@@ -1,6 +1,7 @@
 # app/models/review.py
 from app import db
 from datetime import datetime, timezone
+from app.utils.fields import serialize
 
 
 class Review(db.Model):
@@ -13,19 +14,36 @@ class Review(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     score = db.Column(db.Integer, nullable=False) # e.g., 1-5
     text = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    # Row version, bumped on every update; used (with updated_at) to build ETags
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
     # Foreign key to link to the User who wrote the review
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     user = db.relationship('User', backref=db.backref('reviews', lazy=True))
 
-    # Foreign key to the link to the Sitcom being reviewed
-    sitcom_id = db.Column(db.Integer, db.ForeignKey('sitcoms.id'), nullable=False)
-    sitcom = db.relationship('Sitcom', backref=db.backref('reviews', lazy=True))
+    # Foreign key to the link to the Sitcom being reviewed; the database deletes reviews with their sitcom
+    sitcom_id = db.Column(db.Integer, db.ForeignKey('sitcoms.id', ondelete='CASCADE'), nullable=False)
+    # passive_deletes leaves unloaded reviews to ON DELETE CASCADE instead of loading them to delete one by one
+    sitcom = db.relationship('Sitcom', backref=db.backref('reviews', lazy=True, cascade='all, delete-orphan',
+                                                          passive_deletes=True))
 
-    # Composite Unique Constraint: A User can only review a specific sitcom once
-    __table_args__ = (db.UniqueConstraint('user_id', 'sitcom_id', name='_user_sitcom_review_uc'),)
+    # Composite Unique Constraint: A User can only review a specific sitcom once (it leads with user_id,
+    # so it only serves lookups by user)
+    # Composite index backing the paginated review list of a sitcom (seek on sitcom_id, id)
+    # Covering index for the rating aggregates and statistics (count/sum per sitcom read from the index alone)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'sitcom_id', name='_user_sitcom_review_uc'),
+        db.Index('ix_reviews_sitcom_id_id', 'sitcom_id', 'id'),
+        db.Index('ix_reviews_sitcom_id_score', 'sitcom_id', 'score'),
+    )
+
+    # Let the ORM increment 'version' on every flushed update
+    __mapper_args__ = {'version_id_col': version}
+
+    # Fields of the API representation (selectable with ?fields=)
+    FIELDS = ('id', 'user_id', 'sitcom_id', 'score', 'text', 'created_at', 'updated_at')
 
     def __repr__(self):
         """
@@ -33,17 +51,9 @@ class Review(db.Model):
         """
         return f'<Review ID: {self.id} | User: {self.user_id} | Sitcom: {self.sitcom_id} | Score: {self.score}>'
     
-    def to_dict(self):
+    def to_dict(self, fields=None):
         """
         Converts the Review object to a dictionary
-        Returns user data useful in API responses
+        Returns user data useful in API responses; 'fields' limits it to a sparse fieldset
         """
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'sitcom_id': self.sitcom_id,
-            'score': self.score,
-            'text': self.text,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+        return serialize(self, fields or self.FIELDS)
\ No newline at end of file
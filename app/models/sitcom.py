@@ -1,8 +1,9 @@
 # app/models/sitcom.py
 from app import db
 from datetime import datetime, timezone # To handle created_at and updated_at timestamps
-from sqlalchemy import func
+from sqlalchemy import case, func, select, update
 from app.models.review import Review
+from app.utils.fields import serialize
 
 class Sitcom(db.Model):
     """
@@ -19,44 +20,90 @@ class Sitcom(db.Model):
     years_active = db.Column(db.String(50)) # e.g., "2001-2010" or "2010-Present"
     number_of_seasons = db.Column(db.Integer)
     synopsis = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    # Running rating aggregates, kept in step with the reviews table by the review routes
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Stored mean (0 while unrated) so the list can filter and sort on rating through an index
+    rating_avg = db.Column(db.Float, nullable=False, default=0, server_default='0')
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    # Row version, bumped on every update; used (with updated_at) to build ETags
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
     # Foreign key to link to the User who created this sitcom entry
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     # Define the relationship to the User model
     creator_user = db.relationship('User', backref=db.backref('sitcoms', lazy=True))
 
+    # Composite indexes backing the filters and sorts of the sitcom list (each ends with id for keyset paging)
+    __table_args__ = (
+        db.Index('ix_sitcoms_genre_id', 'genre', 'id'),
+        db.Index('ix_sitcoms_genre_rating_avg_id', 'genre', 'rating_avg', 'id'),
+        db.Index('ix_sitcoms_genre_title', 'genre', 'title'),
+        db.Index('ix_sitcoms_rating_avg_id', 'rating_avg', 'id'),
+        db.Index('ix_sitcoms_created_at_id', 'created_at', 'id'),
+    )
+
+    # Let the ORM increment 'version' on every flushed update
+    __mapper_args__ = {'version_id_col': version}
+
+    # Fields of the API representation (selectable with ?fields=) and the columns behind derived ones
+    FIELDS = ('id', 'title', 'creator', 'genre', 'years_active', 'number_of_seasons', 'synopsis',
+              'user_id', 'average_rating', 'created_at', 'updated_at')
+    FIELD_COLUMNS = {'average_rating': ('rating_count', 'rating_sum')}
+
     def __repr__(self):
         """
         String representation of the Sitcom object
         """
         return f'<Sitcom {self.title}>'
+
+    @property
+    def average_rating(self):
+        """
+        Average review score derived from the stored aggregates (no extra query)
+        """
+        if not self.rating_count:
+            return None
+        return round(self.rating_sum / self.rating_count, 1)
+
+    @staticmethod
+    def apply_rating_delta(sitcom_id, count_delta, sum_delta):
+        """
+        Adjusts the rating aggregates of a sitcom in the current transaction
+        The update is done in SQL so concurrent reviews do not overwrite each other
+        rating_avg is assigned first because MySQL evaluates SET assignments left to right
+        """
+        new_count = Sitcom.rating_count + count_delta
+        new_avg = case((new_count > 0, (Sitcom.rating_sum + sum_delta) * 1.0 / new_count), else_=0)
+        statement = update(Sitcom).where(Sitcom.id == sitcom_id).ordered_values(
+            (Sitcom.rating_avg, new_avg),
+            (Sitcom.rating_count, new_count),
+            (Sitcom.rating_sum, Sitcom.rating_sum + sum_delta),
+            (Sitcom.version, Sitcom.version + 1) # average_rating changed, so cached copies are stale
+        )
+        db.session.execute(statement, execution_options={'synchronize_session': False})
+
+    @staticmethod
+    def recompute_ratings():
+        """
+        Rebuilds the rating aggregates of every sitcom from the reviews table
+        Runs as a single UPDATE with correlated subqueries; returns the number of rows touched
+        """
+        count_subquery = select(func.count(Review.id)).where(Review.sitcom_id == Sitcom.id).scalar_subquery()
+        sum_subquery = select(func.coalesce(func.sum(Review.score), 0)).where(Review.sitcom_id == Sitcom.id).scalar_subquery()
+        avg_subquery = select(func.coalesce(func.avg(Review.score), 0)).where(Review.sitcom_id == Sitcom.id).scalar_subquery()
+        return Sitcom.query.update({
+            Sitcom.rating_count: count_subquery,
+            Sitcom.rating_sum: sum_subquery,
+            Sitcom.rating_avg: avg_subquery,
+            Sitcom.version: Sitcom.version + 1
+        }, synchronize_session=False)
     
-    def to_dict(self):
+    def to_dict(self, fields=None):
         """
         Converts the Sitcom object to a dictionary, excluding sensitive information
-        Returns user data useful in API responses
-        """
-        
-        # calculate the average rating
-        # scalar() executes the query and returns a single value
-        avg_score = db.session.query(func.avg(Review.score)).filter(Review.sitcom_id == self.id).scalar()
-        if avg_score is not None:
-            avg_score = round(float(avg_score), 1)
-        else:
-            avg_score = None
-
-        return {
-            'id': self.id,
-            'title': self.title,
-            'creator': self.creator,
-            'genre': self.genre,
-            'years_active': self.years_active,
-            'number_of_seasons': self.number_of_seasons,
-            'synopsis': self.synopsis,
-            'user_id': self.user_id, # The ID of the user who added this sitcom
-            'average_rating': avg_score,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+        Returns user data useful in API responses; 'fields' limits it to a sparse fieldset
+        'user_id' is the ID of the user who added this sitcom
+        """
+        return serialize(self, fields or self.FIELDS)
\ No newline at end of file
@@ -0,0 +1,22 @@
+# app/models/sitcom_purge.py
+from app import db
+from datetime import datetime, timezone
+
+
+class SitcomPurge(db.Model):
+    """
+    A sitcom whose deletion was accepted and whose characters and reviews are being removed in the background
+    This model defines the 'sitcom_purges' table; the row disappears (ON DELETE CASCADE) with the sitcom itself
+    While it exists the sitcom is hidden from the API (see app/utils/purge.py)
+    """
+    __tablename__ = 'sitcom_purges'
+
+    sitcom_id = db.Column(db.Integer, db.ForeignKey('sitcoms.id', ondelete='CASCADE'), primary_key=True)
+    # When the purge was accepted, or last taken over by a worker that resumed it
+    requested_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        """
+        String representation of the SitcomPurge object
+        """
+        return f'<SitcomPurge for Sitcom ID {self.sitcom_id}>'
@@ -0,0 +1,156 @@
+# app/models/sitcom_stats.py
+from collections import defaultdict
+from app import db
+from sqlalchemy import case, delete, func, insert, select, update
+from app.models.review import Review
+
+
+SCORES = (1, 2, 3, 4, 5)
+
+
+def _month_of(column):
+    """
+    SQL expression turning a timestamp into its 'YYYY-MM' month, for the configured database
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'mysql':
+        return func.date_format(column, '%Y-%m')
+    if dialect == 'sqlite':
+        return func.strftime('%Y-%m', column)
+    return func.to_char(column, 'YYYY-MM')
+
+
+def _upsert_increment(model, rows, key_columns, increment_columns):
+    """
+    Adds the increment columns of each row onto the row with the same key, inserting it when missing
+    Uses one INSERT ... ON DUPLICATE KEY UPDATE / ON CONFLICT DO UPDATE statement for all rows
+    """
+    if not rows:
+        return
+    table = model.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        statement = mysql_insert(table)
+        statement = statement.on_duplicate_key_update({
+            column: table.c[column] + statement.inserted[column] for column in increment_columns
+        })
+    elif dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        statement = dialect_insert(table)
+        statement = statement.on_conflict_do_update(index_elements=key_columns, set_={
+            column: table.c[column] + statement.excluded[column] for column in increment_columns
+        })
+    else:
+        # No native upsert: update, then insert the rows that did not exist yet
+        for row in rows:
+            keys = [table.c[column] == row[column] for column in key_columns]
+            changes = {column: table.c[column] + row[column] for column in increment_columns}
+            if not db.session.execute(update(table).where(*keys).values(changes)).rowcount:
+                db.session.execute(insert(table).values(row))
+        return
+    db.session.execute(statement, rows)
+
+
+class SitcomStats(db.Model):
+    """
+    Score histogram of a sitcom, kept in step with the reviews table by the review routes
+    This model defines the 'sitcom_stats' table; a sitcom without reviews has no row
+    """
+    __tablename__ = 'sitcom_stats'
+
+    sitcom_id = db.Column(db.Integer, db.ForeignKey('sitcoms.id', ondelete='CASCADE'), primary_key=True)
+    score_1 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    score_2 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    score_3 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    score_4 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    score_5 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    def __repr__(self):
+        """
+        String representation of the SitcomStats object
+        """
+        return f'<SitcomStats for Sitcom ID {self.sitcom_id}>'
+
+    @property
+    def histogram(self):
+        """
+        Review count per score, e.g. {'1': 0, '2': 1, '3': 4, '4': 9, '5': 6}
+        """
+        return {str(score): getattr(self, f'score_{score}') for score in SCORES}
+
+    @staticmethod
+    def record_reviews(changes):
+        """
+        Applies review writes to the histograms and monthly buckets in the current transaction
+        'changes' is an iterable of (sitcom_id, score, created_at, sign): sign is 1 for an added review
+        and -1 for a removed one (a score change is a removal plus an addition)
+        Runs one upsert per table however many reviews changed
+        """
+        histograms = defaultdict(lambda: dict.fromkeys(SCORES, 0))
+        months = defaultdict(lambda: [0, 0]) # (sitcom_id, month) -> [count delta, sum delta]
+        for sitcom_id, score, created_at, sign in changes:
+            histograms[sitcom_id][score] += sign
+            bucket = months[(sitcom_id, created_at.strftime('%Y-%m'))]
+            bucket[0] += sign
+            bucket[1] += sign * score
+
+        score_columns = [f'score_{score}' for score in SCORES]
+        _upsert_increment(SitcomStats, [
+            dict({f'score_{score}': count for score, count in histogram.items()}, sitcom_id=sitcom_id)
+            for sitcom_id, histogram in histograms.items()
+        ], ['sitcom_id'], score_columns)
+        _upsert_increment(SitcomMonthlyRating, [
+            {'sitcom_id': sitcom_id, 'month': month, 'review_count': count, 'score_sum': score_sum}
+            for (sitcom_id, month), (count, score_sum) in months.items()
+        ], ['sitcom_id', 'month'], ['review_count', 'score_sum'])
+
+    @staticmethod
+    def recompute():
+        """
+        Rebuilds every histogram and monthly bucket from the reviews table
+        Each table is filled by one INSERT ... SELECT with a set-based GROUP BY (conditional sums per score),
+        so no review is loaded into Python; returns the number of sitcoms with reviews
+        """
+        db.session.execute(delete(SitcomMonthlyRating))
+        db.session.execute(delete(SitcomStats))
+
+        histograms = select(
+            Review.sitcom_id, *[func.sum(case((Review.score == score, 1), else_=0)) for score in SCORES]
+        ).group_by(Review.sitcom_id)
+        db.session.execute(insert(SitcomStats.__table__).from_select(
+            ['sitcom_id'] + [f'score_{score}' for score in SCORES], histograms
+        ))
+
+        month = _month_of(Review.created_at)
+        buckets = select(Review.sitcom_id, month, func.count(Review.id), func.sum(Review.score)) \
+            .group_by(Review.sitcom_id, month)
+        db.session.execute(insert(SitcomMonthlyRating.__table__).from_select(
+            ['sitcom_id', 'month', 'review_count', 'score_sum'], buckets
+        ))
+        return db.session.scalar(select(func.count()).select_from(SitcomStats))
+
+
+class SitcomMonthlyRating(db.Model):
+    """
+    Review count and score sum of a sitcom per calendar month of review creation, for rating trends
+    This model defines the 'sitcom_monthly_ratings' table
+    """
+    __tablename__ = 'sitcom_monthly_ratings'
+
+    sitcom_id = db.Column(db.Integer, db.ForeignKey('sitcoms.id', ondelete='CASCADE'), primary_key=True)
+    month = db.Column(db.String(7), primary_key=True) # 'YYYY-MM'
+    review_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    score_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # Backs the catalog-wide trend, which groups every sitcom's buckets by month
+    __table_args__ = (db.Index('ix_sitcom_monthly_ratings_month', 'month'),)
+
+    def __repr__(self):
+        """
+        String representation of the SitcomMonthlyRating object
+        """
+        return f'<SitcomMonthlyRating {self.month} for Sitcom ID {self.sitcom_id}>'
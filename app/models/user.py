@@ -1,7 +1,7 @@
 # app/model/user.py
 from app import db # Import the SQLAlchemy db instance
 from datetime import datetime, timezone
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.utils.hashing import password_hasher
 
 
 class User(db.Model):
@@ -17,8 +17,8 @@ class User(db.Model):
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(256), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
-    updated_at = db.Column(db.DateTime, default=datetime.now(timezone.utc), onupdate = datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate = lambda: datetime.now(timezone.utc))
 
     # Relationships
     # sitcoms = db.relationship('Sitcom', backref='creator', lazy=True)
@@ -34,15 +34,24 @@ class User(db.Model):
     def set_password(self, password):
         """
         Hashes the given plain-text password and stores it
+        The hash runs in the bounded hashing pool and may raise PasswordHasherBusy
         """
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
 
     def check_password(self, password):
         """
         Checks if the provided plain-text password matched the stored hash
+        The check runs in the bounded hashing pool and may raise PasswordHasherBusy
         """
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+
+    def password_needs_rehash(self):
+        """
+        Checks if the stored hash was made with an outdated method or cost
+        """
+        return password_hasher.needs_rehash(self.password_hash)
     
 
     def to_dict(self):
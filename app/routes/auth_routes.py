@@ -2,6 +2,7 @@
 from flask import Blueprint, request, jsonify
 from app import db, jwt
 from app.models.user import User # Loads the model
+from app.utils.hashing import PasswordHasherBusy
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 
 
@@ -9,6 +10,15 @@ from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identi
 # Groups related routes and register them with the main app
 auth_bp = Blueprint('auth', __name__)
 
+
+def _hashing_busy_response():
+    """
+    Fast 503 returned when the password hashing pool and its queue are full
+    """
+    response = jsonify({"message": "Service busy: too many concurrent logins, please retry shortly"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 @auth_bp.route('/register', methods=['POST'])
 def register_user():
     """
@@ -35,7 +45,10 @@ def register_user():
     
     # Create new user instance and hash password with Werkzeug
     new_user = User(username=username, email=email)
-    new_user.set_password(password)
+    try:
+        new_user.set_password(password)
+    except PasswordHasherBusy:
+        return _hashing_busy_response()
 
     try:
         db.session.add(new_user)
@@ -70,11 +83,25 @@ def login_user():
     user = User.query.filter((User.username == username_or_email) | (User.email == username_or_email)).first()
 
     # Check if user exists and password is correct
-    if user and user.check_password(password):
-        access_token = create_access_token(identity=str(user.id))
-        return jsonify(access_token=access_token), 200
-    else:
-        return jsonify({"message": "Invalid credentials"}), 401
+    try:
+        if not user or not user.check_password(password):
+            return jsonify({"message": "Invalid credentials"}), 401
+    except PasswordHasherBusy:
+        return _hashing_busy_response()
+
+    # Transparently upgrade hashes made with an older PASSWORD_HASH_METHOD; a failure here must not block the login
+    if user.password_needs_rehash():
+        try:
+            user.set_password(password)
+            db.session.commit()
+        except PasswordHasherBusy:
+            pass # Try again on a later login
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error rehashing password: {e}")
+
+    access_token = create_access_token(identity=str(user.id))
+    return jsonify(access_token=access_token), 200
     
 
 @auth_bp.route('/protected', methods=['GET'])
@@ -0,0 +1,77 @@
+# app/routes/changes_routes.py
+from collections import defaultdict
+from flask import Blueprint, current_app, request, jsonify
+from app import db
+from app.models.change_log import ChangeLog
+from app.utils.fields import RowSerializer
+from app.utils.pagination import PaginationError, get_page_args
+
+
+# Create a Blueprint for the change feed route
+changes_bp = Blueprint('changes', __name__)
+
+
+def _current_data(events):
+    """
+    Current representation of every entity created or updated in 'events', one IN query per entity type
+    Returns {(entity, id): dict}; entities deleted since the event are absent
+    """
+    ids = defaultdict(set)
+    for event in events:
+        if event.action != 'delete':
+            ids[event.entity].add(event.entity_id)
+
+    data = {}
+    for entity, entity_ids in ids.items():
+        model = ChangeLog.ENTITIES[entity]
+        serializer = RowSerializer(model)
+        for row in db.session.query(*serializer.columns).filter(model.id.in_(entity_ids)):
+            data[(entity, row.id)] = serializer(row)
+    return data
+
+# READ the changes made after a cursor
+@changes_bp.route('/changes', methods=['GET'])
+def get_changes():
+    """
+    GET the create/update/delete events of sitcoms, characters and reviews after ?since= (a cursor), oldest first
+    Create and update events carry the entity's current 'data'; delete events are tombstones without data
+    Supports ?limit=; pass next_cursor back as ?since= to continue
+    """
+    try:
+        since = int(request.args.get('since', 0))
+        if since < 0:
+            raise ValueError
+    except ValueError:
+        return jsonify({"message": "since must be a non-negative integer cursor"}), 400
+
+    try:
+        limit, _ = get_page_args()
+    except PaginationError as e:
+        return jsonify({"message": str(e)}), 400
+
+    # Starting from 0 replays the whole log, which compaction keeps equivalent to the current catalog
+    horizon = ChangeLog.horizon()
+    if 0 < since < horizon:
+        return jsonify({"message": "Cursor is older than the compaction horizon; start again from since=0",
+                        "horizon": horizon}), 410
+
+    events = ChangeLog.read(since, limit + 1, current_app.config['CHANGES_SETTLE_SECONDS'])
+    has_more = len(events) > limit
+    events = events[:limit]
+
+    data = _current_data(events)
+    items = [{
+        "cursor": event.id,
+        "entity": event.entity,
+        "id": event.entity_id,
+        "sitcom_id": event.sitcom_id,
+        "action": event.action,
+        "changed_at": event.changed_at,
+        "data": data.get((event.entity, event.entity_id)) if event.action != 'delete' else None
+    } for event in events]
+
+    return jsonify({
+        "items": items,
+        "next_cursor": events[-1].id if events else since,
+        "has_more": has_more
+    }), 200
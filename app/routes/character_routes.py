@@ -1,8 +1,17 @@
 # app/routes/character_routes.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
+from sqlalchemy import select
+from sqlalchemy.orm.exc import StaleDataError
 from app import db
+from app.models.change_log import ChangeLog
 from app.models.character import Character
 from app.models.sitcom import Sitcom
+from app.utils.bulk import BulkRequestError, bulk_response, chunked, get_bulk_items, insert_rows
+from app.utils.cache import cache
+from app.utils.conditional import add_validators, item_validators, not_modified_response, page_validators
+from app.utils.fields import FieldsError, RowSerializer, get_fields, load_fields
+from app.utils.multiget import IdsError, get_ids, multi_get_response
+from app.utils.pagination import PaginationError, get_page_args, keyset_page
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 
@@ -10,6 +19,45 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 character_bp = Blueprint('character', __name__)
 
 
+def _parse_character_data(data):
+    """
+    Validates the JSON data of a new character
+    Returns (fields, None) when valid, or (None, error message) otherwise
+    """
+    if not isinstance(data, dict) or not data:
+        return None, "No input data provided"
+
+    name = data.get('name')
+    if not name:
+        return None, "Character name is required"
+
+    return {
+        'name': name,
+        'actor': data.get('actor'),
+        'role': data.get('role'),
+        'description': data.get('description')
+    }, None
+
+
+def _owned_sitcom_ids(sitcom_id, user_id):
+    """
+    Subquery matching sitcom_id only when the sitcom belongs to user_id
+    Lets a write check ownership inside its own statement instead of loading the sitcom first
+    """
+    return select(Sitcom.id).where(Sitcom.id == sitcom_id, Sitcom.user_id == user_id)
+
+
+def _character_write_failure(sitcom_id, character_id, action):
+    """
+    Explains why a conditional character write matched no row (only runs on the failure path)
+    Returns 404 when the character does not exist in this sitcom, 403 when the sitcom belongs to someone else
+    """
+    exists = db.session.query(Character.id).filter_by(id=character_id, sitcom_id=sitcom_id).first()
+    if not exists:
+        return jsonify({"message": "Character not found or does not belong to this sitcom"}), 404
+    return jsonify({"message": f"Forbidden: You can only {action} characters for sitcoms you created"}), 403
+
+
 # CREATE a new character for a specific Sitcom
 @character_bp.route('/sitcoms/<int:sitcom_id>/characters', methods=['POST'])
 @jwt_required()
@@ -31,61 +79,173 @@ def create_character(sitcom_id):
     if sitcom.user_id != int(current_user_id):
         return jsonify({"message": "Forbidden: You can only add characters to sitcoms you created"}), 403
     
-    name = data.get('name')
-    if not name:
-        return jsonify({"message": "Character name is required"}), 400
-    
-    actor = data.get('actor')
-    role = data.get('role')
-    description = data.get('description')
-
-    new_character = Character(
-        name=name,
-        actor=actor,
-        role=role,
-        description=description,
-        sitcom_id=sitcom_id
-    )
+    fields, error = _parse_character_data(data)
+    if error:
+        return jsonify({"message": error}), 400
+
+    new_character = Character(sitcom_id=sitcom_id, **fields)
 
     try:
         db.session.add(new_character)
+        db.session.flush()
+        ChangeLog.record('character', new_character.id, 'create', sitcom_id)
+        character_data = new_character.to_dict() # Serialize before commit expires the object
         db.session.commit()
-        return jsonify({"message": "Character created successfully", "character": new_character.to_dict()}), 201
+        cache.invalidate(f'sitcom:{sitcom_id}:characters')
+        return jsonify({"message": "Character created successfully", "character": character_data}), 201
     except Exception as e:
         db.session.rollback()
         print(f"Error creating character: {e}")
         return jsonify({"message": "Error creating character", "error": str(e)}), 500
+
+
+# CREATE many Characters (across sitcoms) in one request
+@character_bp.route('/characters/bulk', methods=['POST'])
+@jwt_required()
+def create_characters_bulk():
+    """
+    Adds up to BULK_MAX_ITEMS characters in one transaction
+    Expects a JSON array of character objects, each with a 'sitcom_id'; reports success or failure per item
+    """
+    current_user_id = int(get_jwt_identity())
+    try:
+        items = get_bulk_items()
+    except BulkRequestError as e:
+        return jsonify({"message": str(e)}), 400
+
+    results = [None] * len(items)
+    valid = [] # (index, sitcom_id, fields) triples that passed validation
+    for index, data in enumerate(items):
+        fields, error = _parse_character_data(data)
+        if not error:
+            try:
+                sitcom_id = int(data.get('sitcom_id'))
+            except (TypeError, ValueError):
+                error = "sitcom_id must be an integer"
+        if error:
+            results[index] = {"index": index, "status": 400, "message": error}
+        else:
+            valid.append((index, sitcom_id, fields))
+
+    # Resolve the owner of every referenced sitcom with one IN query per chunk
+    sitcom_ids = list({sitcom_id for _, sitcom_id, _ in valid})
+    owners = {}
+    for chunk in chunked(sitcom_ids, current_app.config['BULK_CHUNK_SIZE']):
+        owners.update(db.session.execute(select(Sitcom.id, Sitcom.user_id).where(Sitcom.id.in_(chunk))).all())
+
+    rows, row_indexes = [], []
+    for index, sitcom_id, fields in valid:
+        if sitcom_id not in owners:
+            results[index] = {"index": index, "status": 404, "message": "Sitcom not found"}
+        elif owners[sitcom_id] != current_user_id:
+            results[index] = {"index": index, "status": 403, "message": "Forbidden: You can only add characters to sitcoms you created"}
+        else:
+            rows.append(dict(fields, sitcom_id=sitcom_id))
+            row_indexes.append(index)
+
+    try:
+        last_id = ChangeLog.last_id('character')
+        ids = insert_rows(Character, rows)
+        ChangeLog.record_inserted('character', last_id, Character.sitcom_id.in_({row['sitcom_id'] for row in rows}))
+        db.session.commit()
+        cache.invalidate(*{f'sitcom:{row["sitcom_id"]}:characters' for row in rows})
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error bulk creating characters: {e}")
+        return jsonify({"message": "Error creating characters", "error": str(e)}), 500
+
+    for index, character_id in zip(row_indexes, ids):
+        results[index] = {"index": index, "status": 201, "id": character_id}
+    body, status = bulk_response(results)
+    return jsonify(body), status
     
 
 # READ all Characters for a specific Sitcom
 @character_bp.route('/sitcoms/<int:sitcom_id>/characters', methods=['GET'])
+@cache.cached('sitcom:{sitcom_id}:characters')
 def get_all_characters_for_sitcom(sitcom_id):
     """
-    Read all Characters in a specific Sitcom
+    Read the Characters in a specific Sitcom one page at a time
+    Supports ?limit= and ?cursor= (keyset pagination on (sitcom_id, id)), ?fields= and conditional GET
     """
-    sitcom = Sitcom.query.get(sitcom_id)
-    if not sitcom:
+    try:
+        fields = get_fields(Character)
+    except FieldsError as e:
+        return jsonify({"message": str(e)}), 400
+
+    if not db.session.query(Sitcom.id).filter_by(id=sitcom_id).first():
         return jsonify({"message": "Sitcom not found"}), 404
     
-    characters = sitcom.characters
-    characters_data = [character.to_dict() for character in characters]
-    return jsonify(characters_data), 200
+    try:
+        limit, cursor = get_page_args()
+        # Plain rows rather than ORM objects: the list is serialized straight from the selected columns
+        serializer = RowSerializer(Character, fields, ['version', 'updated_at'])
+        query = db.session.query(*serializer.columns).filter(Character.sitcom_id == sitcom_id)
+        rows, next_cursor = keyset_page(query, [(Character.id, False)], limit, cursor)
+    except PaginationError as e:
+        return jsonify({"message": str(e)}), 400
+
+    etag, last_modified = page_validators(Character, rows, next_cursor)
+    not_modified = not_modified_response(etag, last_modified)
+    if not_modified:
+        return not_modified
+
+    characters_data = [serializer(row) for row in rows]
+    return add_validators(jsonify({"items": characters_data, "next_cursor": next_cursor}), etag, last_modified), 200
+
+
+# READ many Characters (across sitcoms) by ID
+@character_bp.route('/characters', methods=['GET'])
+def get_characters_by_ids():
+    """
+    Multi-get: GET /api/characters?ids=1,2,3 resolves every ID with one IN query
+    Returns the characters in request order, with null (and an entry in 'missing') for unknown IDs
+    Supports ?fields= and conditional GET
+    """
+    try:
+        ids = get_ids()
+        fields = get_fields(Character)
+    except (IdsError, FieldsError) as e:
+        return jsonify({"message": str(e)}), 400
+
+    unique_ids = list(set(ids))
+    characters = Character.query.options(*load_fields(Character, fields, 'version', 'updated_at')) \
+        .filter(Character.id.in_(unique_ids)).order_by(Character.id).all()
+    etag, last_modified = page_validators(Character, characters)
+    not_modified = not_modified_response(etag, last_modified)
+    if not_modified:
+        return not_modified
+
+    found = {character.id: character.to_dict(fields) for character in characters}
+    return add_validators(jsonify(multi_get_response(ids, found)), etag, last_modified), 200
 
 
 # READ a single Character by ID
 @character_bp.route('/sitcoms/<int:sitcom_id>/characters/<int:character_id>', methods=['GET'])
+@cache.cached('sitcom:{sitcom_id}:characters')
 def get_character(sitcom_id, character_id):
     """
     Read a single Character in a specific Sitcom (by ID)
     """
-    sitcom = Sitcom.query.get(sitcom_id)
-    if not sitcom:
+    try:
+        fields = get_fields(Character)
+    except FieldsError as e:
+        return jsonify({"message": str(e)}), 400
+
+    if not db.session.query(Sitcom.id).filter_by(id=sitcom_id).first():
         return jsonify({"message": "Sitcom not found"}), 404
     
-    character = Character.query.filter_by(id=character_id, sitcom_id=sitcom_id).first()
-    if character:
-        return jsonify(character.to_dict()), 200
-    return jsonify({"message": "Character not found or does not belong to this sitcom"}), 404
+    # version and updated_at are needed for the ETag
+    character = Character.query.options(*load_fields(Character, fields, 'version', 'updated_at')) \
+        .filter_by(id=character_id, sitcom_id=sitcom_id).first()
+    if not character:
+        return jsonify({"message": "Character not found or does not belong to this sitcom"}), 404
+
+    etag, last_modified = item_validators(character)
+    not_modified = not_modified_response(etag, last_modified)
+    if not_modified:
+        return not_modified
+    return add_validators(jsonify(character.to_dict(fields)), etag, last_modified), 200
 
 
 # UPDATE an existing Character
@@ -99,19 +259,18 @@ def update_character(sitcom_id, character_id):
 
     data = request.get_json()
     if not data:
-        return ({"message": "No input data provided"}), 400
-    
-    sitcom = Sitcom.query.get(sitcom_id)
-    if not sitcom:
-        return jsonify({"message": "Sitcom not found"}), 404
-    
-    # Only the creator of the sitcom can update its characters
-    if sitcom.user_id != int(current_user_id):
-        return jsonify({"message": "Forbidden: You can only update characters for sitcoms you created"}), 404
+        return jsonify({"message": "No input data provided"}), 400
     
-    character = Character.query.filter_by(id=character_id, sitcom_id=sitcom_id).first()
-    if not character:
+    # Fetch the character together with the owner of its sitcom in one joined query
+    row = db.session.query(Character, Sitcom.user_id).join(Sitcom, Character.sitcom_id == Sitcom.id) \
+        .filter(Character.id == character_id, Character.sitcom_id == sitcom_id).first()
+    if not row:
         return jsonify({"message": "Character not found or does not belong to this sitcom"}), 404
+    character, owner_id = row
+
+    # Only the creator of the sitcom can update its characters
+    if owner_id != int(current_user_id):
+        return jsonify({"message": "Forbidden: You can only update characters for sitcoms you created"}), 403
     
     character.name = data.get('name', character.name)
     character.actor = data.get('actor', character.actor)
@@ -119,8 +278,17 @@ def update_character(sitcom_id, character_id):
     character.description = data.get('description', character.description)
 
     try:
+        # Serialize after the flush but before the commit, so no refresh SELECT is needed
+        db.session.flush()
+        ChangeLog.record('character', character_id, 'update', sitcom_id)
+        character_data = character.to_dict()
         db.session.commit()
-        return jsonify({"message": "Character updated successfully", "character": character.to_dict()}), 200
+        cache.invalidate(f'sitcom:{sitcom_id}:characters')
+        return jsonify({"message": "Character updated successfully", "character": character_data}), 200
+    except StaleDataError:
+        # The character was changed or deleted by another request after it was loaded (its version moved on)
+        db.session.rollback()
+        return jsonify({"message": "Conflict: The character is being modified concurrently, please retry"}), 409
     except Exception as e:
         db.session.rollback()
         print(f"Error updating character: {e}")
@@ -136,21 +304,18 @@ def delete_character(sitcom_id, character_id):
     """
     current_user_id = get_jwt_identity()
 
-    sitcom = Sitcom.query.get(sitcom_id)
-    if not sitcom:
-        return jsonify({"message": "Sitcom not found"}), 404
-    
-    # Only the creator of the sitcom can delete its characters
-    if sitcom.user_id != int(current_user_id):
-        return jsonify({"message": "Forbidden: You can only delete characters for sitcoms you created"}), 404
-    
-    character = Character.query.filter_by(id=character_id, sitcom_id=sitcom_id).first()
-    if not character:
-        return jsonify({"message": "Character not found or does not belong to this sitcom"}), 404
-
     try:
-        db.session.delete(character)
+        # Only the creator of the sitcom can delete its characters; the ownership check is part of the DELETE
+        deleted = Character.query.filter(
+            Character.id == character_id,
+            Character.sitcom_id.in_(_owned_sitcom_ids(sitcom_id, int(current_user_id)))
+        ).delete(synchronize_session=False)
+        if not deleted:
+            db.session.rollback()
+            return _character_write_failure(sitcom_id, character_id, 'delete')
+        ChangeLog.record('character', character_id, 'delete', sitcom_id)
         db.session.commit()
+        cache.invalidate(f'sitcom:{sitcom_id}:characters')
         return jsonify({"message": "Character deleted successfully"}), 200
     except Exception as e:
         db.session.rollback()
@@ -0,0 +1,26 @@
+# app/routes/export_routes.py
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from app.utils.export import EXPORT_FORMATS, EXPORT_MIMETYPES, iter_export
+from flask_jwt_extended import jwt_required
+
+
+# Create a Blueprint for the export routes
+export_bp = Blueprint('export', __name__)
+
+# EXPORT the full catalog
+@export_bp.route('/export', methods=['GET'])
+@jwt_required() # Full exports are heavy, so they are limited to authenticated users
+def export_catalog():
+    """
+    Streams every sitcom, character and review as NDJSON (default) or CSV
+    Use ?format=csv for CSV output
+    """
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"message": f"Format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+    batch_size = current_app.config['EXPORT_BATCH_SIZE']
+    # stream_with_context keeps the app context (and db.session) alive while the generator runs
+    response = Response(stream_with_context(iter_export(export_format, batch_size)), mimetype=EXPORT_MIMETYPES[export_format])
+    response.headers['Content-Disposition'] = f'attachment; filename=sitcomverse.{export_format}'
+    return response
@@ -0,0 +1,40 @@
+# app/routes/metrics_routes.py
+import hmac
+from flask import Blueprint, abort, current_app, jsonify, request
+from app import db
+from app.utils.cache import cache
+
+
+# Create a Blueprint for internal metrics routes (served under /internal, not /api)
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.before_request
+def require_metrics_access():
+    """
+    Answers 404 unless METRICS_ENABLED is set, then 403 unless the request carries METRICS_TOKEN
+    as a bearer token or comes from one of METRICS_ALLOWED_IPS
+    """
+    config = current_app.config
+    if not config['METRICS_ENABLED']:
+        abort(404)
+    token = config['METRICS_TOKEN']
+    if token and hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode()):
+        return None
+    allowed_ips = {ip.strip() for ip in config['METRICS_ALLOWED_IPS'].split(',') if ip.strip()}
+    if request.remote_addr in allowed_ips:
+        return None
+    abort(403)
+
+# READ the runtime metrics of this worker process
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Returns the counters of this worker process (response cache, connection pool, admission control)
+    and its cold start timings
+    """
+    return jsonify({
+        "cache": cache.stats(),
+        "pool": current_app.extensions['pool_metrics'].snapshot(db.engine.pool),
+        "admission": current_app.extensions['admission'].snapshot(),
+        "startup": current_app.extensions.get('startup') # Only set when served through wsgi.py
+    }), 200
@@ -1,15 +1,42 @@
 # app/routes/review_routes.py
-from flask import Blueprint, request, jsonify
+from collections import defaultdict
+from datetime import datetime, timezone
+from flask import Blueprint, current_app, request, jsonify
+from sqlalchemy import select
 from app import db
+from app.models.change_log import ChangeLog
 from app.models.review import Review
 from app.models.sitcom import Sitcom
+from app.models.sitcom_stats import SitcomStats
+from app.utils.bulk import BulkRequestError, bulk_response, chunked, get_bulk_items, insert_rows
+from app.utils.cache import cache
+from app.utils.conditional import add_validators, item_validators, not_modified_response, page_validators
+from app.utils.fields import FieldsError, RowSerializer, get_fields, load_fields
+from app.utils.pagination import PaginationError, get_page_args, keyset_page
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy.exc import IntegrityError # To catch unique constraint violation
+from sqlalchemy.orm.exc import StaleDataError
 
 
 # Create a Blueprint for review routes
 review_bp = Blueprint('review', __name__)
 
+
+def _parse_score(score):
+    """
+    Validates a review score (1-5 star rating)
+    Returns (score, None) when valid, or (None, error message) otherwise
+    """
+    if score is None:
+        return None, "Score is required"
+    try:
+        score = int(score)
+    except (TypeError, ValueError):
+        return None, "Score must be an integer"
+    if not (1 <= score <= 5): # Using 1-5 star rating
+        return None, "Score must be an integer between 1 and 5"
+    return score, None
+
 # CREATE a Review for a specific sitcom
 @review_bp.route('/sitcoms/<int:sitcom_id>/reviews', methods=['POST'])
 @jwt_required()
@@ -29,15 +56,9 @@ def create_review(sitcom_id):
         return jsonify({"message": "Sitcom not found"}), 404
     
     # Validate required fields for a review
-    score = data.get('score')
-    if score is None:
-        return jsonify({"message": "Score is required"}), 400
-    try:
-        score = int(score)
-        if not (1 <= score <= 5): # Using 1-5 star rating
-            return jsonify({"message": "Score must be an integer between 1 and 5"}), 400
-    except ValueError:
-        return jsonify({"message": "Score must be an integer"}), 400
+    score, error = _parse_score(data.get('score'))
+    if error:
+        return jsonify({"message": error}), 400
     
     text = data.get('text')
 
@@ -50,8 +71,15 @@ def create_review(sitcom_id):
 
     try:
         db.session.add(new_review)
+        db.session.flush() # Surface the unique constraint violation before touching the aggregates
+        Sitcom.apply_rating_delta(sitcom_id, 1, score)
+        SitcomStats.record_reviews([(sitcom_id, score, new_review.created_at, 1)])
+        ChangeLog.record('review', new_review.id, 'create', sitcom_id)
+        ChangeLog.record('sitcom', sitcom_id, 'update') # Its average_rating changed
+        review_data = new_review.to_dict() # Serialize before commit expires the object
         db.session.commit()
-        return jsonify({"message": "Review created successfully", "review": new_review.to_dict()}), 201
+        cache.invalidate(f'sitcom:{sitcom_id}:reviews', f'sitcom:{sitcom_id}', 'sitcoms:by-rating') # The rating of the sitcom changed too
+        return jsonify({"message": "Review created successfully", "review": review_data}), 201
     except IntegrityError: # Catch the _user_sitcom_review_uc unique constraint violation
         db.session.rollback()
         return jsonify({"message": "You have already submitted a review for this sitcom"}), 409
@@ -61,34 +89,145 @@ def create_review(sitcom_id):
         return jsonify({"message": "Error creating review", "error": str(e)}), 500
 
 
+# CREATE many Reviews (across sitcoms) in one request
+@review_bp.route('/reviews/bulk', methods=['POST'])
+@jwt_required()
+def create_reviews_bulk():
+    """
+    Adds up to BULK_MAX_ITEMS reviews by the current user in one transaction
+    Expects a JSON array of review objects, each with a 'sitcom_id'; reports success or failure per item
+    """
+    current_user_id = int(get_jwt_identity())
+    try:
+        items = get_bulk_items()
+    except BulkRequestError as e:
+        return jsonify({"message": str(e)}), 400
+
+    results = [None] * len(items)
+    valid = [] # (index, sitcom_id, score, text) tuples that passed validation
+    for index, data in enumerate(items):
+        if not isinstance(data, dict) or not data:
+            score, error = None, "No input data provided"
+        else:
+            score, error = _parse_score(data.get('score'))
+        if not error:
+            try:
+                sitcom_id = int(data.get('sitcom_id'))
+            except (TypeError, ValueError):
+                error = "sitcom_id must be an integer"
+        if error:
+            results[index] = {"index": index, "status": 400, "message": error}
+        else:
+            valid.append((index, sitcom_id, score, data.get('text')))
+
+    # Check which sitcoms exist and which the user already reviewed, one IN query each per chunk
+    sitcom_ids = list({sitcom_id for _, sitcom_id, _, _ in valid})
+    existing_sitcoms, reviewed_sitcoms = set(), set()
+    for chunk in chunked(sitcom_ids, current_app.config['BULK_CHUNK_SIZE']):
+        existing_sitcoms.update(db.session.scalars(select(Sitcom.id).where(Sitcom.id.in_(chunk))))
+        reviewed_sitcoms.update(db.session.scalars(
+            select(Review.sitcom_id).where(Review.user_id == current_user_id, Review.sitcom_id.in_(chunk))
+        ))
+
+    rows, row_indexes = [], []
+    rating_deltas = defaultdict(lambda: [0, 0]) # sitcom_id -> [count delta, sum delta]
+    for index, sitcom_id, score, text in valid:
+        if sitcom_id not in existing_sitcoms:
+            results[index] = {"index": index, "status": 404, "message": "Sitcom not found"}
+        elif sitcom_id in reviewed_sitcoms:
+            results[index] = {"index": index, "status": 409, "message": "You have already submitted a review for this sitcom"}
+        else:
+            reviewed_sitcoms.add(sitcom_id) # Reject later duplicates within the same request
+            rows.append({'user_id': current_user_id, 'sitcom_id': sitcom_id, 'score': score, 'text': text})
+            row_indexes.append(index)
+            rating_deltas[sitcom_id][0] += 1
+            rating_deltas[sitcom_id][1] += score
+
+    try:
+        last_id = ChangeLog.last_id('review')
+        ids = insert_rows(Review, rows)
+        for sitcom_id, (count_delta, sum_delta) in rating_deltas.items():
+            Sitcom.apply_rating_delta(sitcom_id, count_delta, sum_delta)
+        created_at = datetime.now(timezone.utc) # The month bucket the new rows fall into
+        SitcomStats.record_reviews((row['sitcom_id'], row['score'], created_at, 1) for row in rows)
+        ChangeLog.record_inserted('review', last_id, Review.user_id == current_user_id)
+        ChangeLog.record_many('sitcom', 'update', [(sitcom_id, sitcom_id) for sitcom_id in rating_deltas])
+        db.session.commit()
+        for sitcom_id in rating_deltas:
+            cache.invalidate(f'sitcom:{sitcom_id}:reviews', f'sitcom:{sitcom_id}', 'sitcoms:by-rating')
+    except IntegrityError: # A review was added by a concurrent request
+        db.session.rollback()
+        return jsonify({"message": "Conflict while inserting reviews; no items were created"}), 409
+    except Exception as e:
+        db.session.rollback()
+        print(f'Error bulk creating reviews: {e}')
+        return jsonify({"message": "Error creating reviews", "error": str(e)}), 500
+
+    for index, review_id in zip(row_indexes, ids):
+        results[index] = {"index": index, "status": 201, "id": review_id}
+    body, status = bulk_response(results)
+    return jsonify(body), status
+
+
 # READ all Reviews for a specific Sitcom
 @review_bp.route('/sitcoms/<int:sitcom_id>/reviews', methods=['GET'])
+@cache.cached('sitcom:{sitcom_id}:reviews')
 def get_all_reviews_for_sitcom(sitcom_id):
     """
-    GET all the Reviews for sitcom with sitcom_id
+    GET the Reviews for sitcom with sitcom_id one page at a time
+    Supports ?limit= and ?cursor= (keyset pagination on (sitcom_id, id)), ?fields= and conditional GET
     """
-    sitcom = Sitcom.query.get(sitcom_id)
-    if not sitcom:
+    try:
+        fields = get_fields(Review)
+    except FieldsError as e:
+        return jsonify({"message": str(e)}), 400
+
+    if not db.session.query(Sitcom.id).filter_by(id=sitcom_id).first():
         return jsonify({"message": "Sitcom not found"}), 404
     
-    reviews = sitcom.reviews
-    reviews_data = [review.to_dict() for review in reviews]
-    return jsonify(reviews_data), 200
+    try:
+        limit, cursor = get_page_args()
+        # Plain rows rather than ORM objects: the list is serialized straight from the selected columns
+        serializer = RowSerializer(Review, fields, ['version', 'updated_at'])
+        query = db.session.query(*serializer.columns).filter(Review.sitcom_id == sitcom_id)
+        rows, next_cursor = keyset_page(query, [(Review.id, False)], limit, cursor)
+    except PaginationError as e:
+        return jsonify({"message": str(e)}), 400
+
+    etag, last_modified = page_validators(Review, rows, next_cursor)
+    not_modified = not_modified_response(etag, last_modified)
+    if not_modified:
+        return not_modified
+
+    reviews_data = [serializer(row) for row in rows]
+    return add_validators(jsonify({"items": reviews_data, "next_cursor": next_cursor}), etag, last_modified), 200
 
 # READ a single Review for a specific Sitcom
 @review_bp.route('/sitcoms/<int:sitcom_id>/reviews/<int:review_id>', methods=['GET'])
+@cache.cached('sitcom:{sitcom_id}:reviews')
 def get_review(sitcom_id, review_id):
     """
     GET a single Review for a Sitcom by Review ID
     """
-    sitcom = Sitcom.query.get(sitcom_id)
-    if not sitcom:
+    try:
+        fields = get_fields(Review)
+    except FieldsError as e:
+        return jsonify({"message": str(e)}), 400
+
+    if not db.session.query(Sitcom.id).filter_by(id=sitcom_id).first():
         return jsonify({"message": "Sitcom not found"}), 404
     
-    review = Review.query.filter_by(id=review_id, sitcom_id=sitcom_id).first()
-    if review:
-        return jsonify(review.to_dict()), 200
-    return jsonify({"message": "Review not found or does not belong to this sitcom"}), 404
+    # version and updated_at are needed for the ETag
+    review = Review.query.options(*load_fields(Review, fields, 'version', 'updated_at')) \
+        .filter_by(id=review_id, sitcom_id=sitcom_id).first()
+    if not review:
+        return jsonify({"message": "Review not found or does not belong to this sitcom"}), 404
+
+    etag, last_modified = item_validators(review)
+    not_modified = not_modified_response(etag, last_modified)
+    if not_modified:
+        return not_modified
+    return add_validators(jsonify(review.to_dict(fields)), etag, last_modified), 200
 
 # UPDATE an existing Review
 @review_bp.route('/sitcoms/<int:sitcom_id>/reviews/<int:review_id>', methods=['PUT'])
@@ -108,25 +247,36 @@ def update_review(sitcom_id, review_id):
     if not review:
         return jsonify({"message": "Review not found or you do not have permission to update it"}), 404
     
-    score = data.get('score')
-    if score is not None:
-        try:
-            score = int(score)
-            if not (1 <= score <= 5):
-                return jsonify({"message": "Score must be an integer between 1 and 5"}), 400
-            review.score = score # Update only if valid
-        except ValueError:
-            return jsonify({"message": "Score must be an integer"}), 400
+    old_score = review.score
+    if data.get('score') is not None:
+        score, error = _parse_score(data.get('score'))
+        if error:
+            return jsonify({"message": error}), 400
+        review.score = score # Update only if valid
         
     review.text = data.get('text', review.text)
 
     try:
+        if review.score != old_score:
+            Sitcom.apply_rating_delta(sitcom_id, 0, review.score - old_score) # Also flushes the review
+            SitcomStats.record_reviews([(sitcom_id, old_score, review.created_at, -1),
+                                        (sitcom_id, review.score, review.created_at, 1)])
+            ChangeLog.record('sitcom', sitcom_id, 'update')
+        else:
+            db.session.flush()
+        ChangeLog.record('review', review_id, 'update', sitcom_id)
+        review_data = review.to_dict() # Serialize before commit expires the object
         db.session.commit()
-        return jsonify({"message": "Review updated successfully", "review": review.to_dict()}), 200
+        cache.invalidate(f'sitcom:{sitcom_id}:reviews', f'sitcom:{sitcom_id}', 'sitcoms:by-rating')
+        return jsonify({"message": "Review updated successfully", "review": review_data}), 200
+    except StaleDataError:
+        # The review was changed or deleted by another request after it was loaded (its version moved on)
+        db.session.rollback()
+        return jsonify({"message": "Conflict: The review is being modified concurrently, please retry"}), 409
     except Exception as e:
         db.session.rollback()
         print(f'Error updating review: {e}')
-        return jsonify({"message": "Error updating review", "error": str(e)})
+        return jsonify({"message": "Error updating review", "error": str(e)}), 500
     
 # DELETE a Review
 @review_bp.route('/sitcoms/<int:sitcom_id>/reviews/<int:review_id>', methods=['DELETE'])
@@ -137,18 +287,24 @@ def delete_review(sitcom_id, review_id):
     """
     current_user_id = get_jwt_identity()
 
-    sitcom = Sitcom.query.get(sitcom_id)
-    if not sitcom:
-        return jsonify({"message": "Sitcom not found"}), 404
-    
+    # The user_id filter already enforces ownership, so the sitcom does not need to be loaded
     review = Review.query.filter_by(id=review_id, sitcom_id=sitcom_id, user_id=int(current_user_id)).first()
     if not review:
         return jsonify({"message": "Review not found or you do not have permission to delete it"}), 404
     
     try:
         db.session.delete(review)
+        Sitcom.apply_rating_delta(sitcom_id, -1, -review.score)
+        SitcomStats.record_reviews([(sitcom_id, review.score, review.created_at, -1)])
+        ChangeLog.record('review', review_id, 'delete', sitcom_id)
+        ChangeLog.record('sitcom', sitcom_id, 'update')
         db.session.commit()
+        cache.invalidate(f'sitcom:{sitcom_id}:reviews', f'sitcom:{sitcom_id}', 'sitcoms:by-rating')
         return jsonify({"message": "Review deleted successfully"}), 200
+    except StaleDataError:
+        # The review was changed or deleted by another request after it was loaded (its version moved on)
+        db.session.rollback()
+        return jsonify({"message": "Conflict: The review is being modified concurrently, please retry"}), 409
     except Exception as e:
         db.session.rollback()
         print(f'Error deleting review: {e}')
@@ -0,0 +1,35 @@
+# app/routes/search_routes.py
+from flask import Blueprint, request, jsonify
+from app.utils.pagination import PaginationError, get_page_args
+from app.utils.search import SEARCH_TABLES, SearchNotSupported, search
+
+
+# Create a Blueprint for the search route
+search_bp = Blueprint('search', __name__)
+
+# SEARCH sitcoms and characters
+@search_bp.route('/search', methods=['GET'])
+def search_catalog():
+    """
+    Full-text search over sitcoms (title, synopsis, creator) and characters (name, actor, description)
+    Expects ?q=; optional ?type=sitcoms|characters and ?limit= (results per type)
+    """
+    query = (request.args.get('q') or '').strip()
+    if not query:
+        return jsonify({"message": "Search query 'q' is required"}), 400
+
+    search_type = request.args.get('type')
+    if search_type and search_type not in SEARCH_TABLES:
+        return jsonify({"message": f"Type must be one of: {', '.join(SEARCH_TABLES)}"}), 400
+
+    try:
+        limit, _ = get_page_args()
+        results = {}
+        for table in ([search_type] if search_type else SEARCH_TABLES):
+            results[table] = [dict(obj.to_dict(), score=round(score, 4)) for obj, score in search(table, query, limit)]
+    except PaginationError as e:
+        return jsonify({"message": str(e)}), 400
+    except SearchNotSupported as e:
+        return jsonify({"message": str(e)}), 501
+
+    return jsonify(results), 200
@@ -0,0 +1,184 @@
+# app/routes/stats_routes.py
+import json
+import time
+from datetime import datetime, timezone
+from flask import Blueprint, current_app, jsonify
+from sqlalchemy import func, select
+from app import db
+from app.models.sitcom import Sitcom
+from app.models.sitcom_stats import SCORES, SitcomMonthlyRating, SitcomStats
+from app.utils.cache import cache
+from app.utils.conditional import add_validators, make_etag, not_modified_response
+
+
+# Create a Blueprint for the review statistics routes
+stats_bp = Blueprint('stats', __name__)
+
+# Total reviews and score sum of a histogram row, as SQL expressions over sitcom_stats
+REVIEW_COUNT = sum(getattr(SitcomStats, f'score_{score}') for score in SCORES)
+SCORE_SUM = sum(getattr(SitcomStats, f'score_{score}') * score for score in SCORES)
+
+
+def _mean(count, score_sum):
+    """
+    Mean score rounded to two decimals, or None without reviews
+    """
+    return round(score_sum / count, 2) if count else None
+
+
+def _weighted_rating(count, score_sum, prior_mean):
+    """
+    Bayesian average: the sitcom's scores plus STATS_PRIOR_WEIGHT virtual reviews at the catalog mean
+    A sitcom with a few reviews stays near the catalog mean instead of topping the chart with one 5-star review
+    """
+    if prior_mean is None:
+        return None
+    weight = current_app.config['STATS_PRIOR_WEIGHT']
+    return round((weight * prior_mean + score_sum) / (weight + count), 2) if weight + count else None
+
+
+def _trend_start():
+    """
+    First 'YYYY-MM' month of the trend window: the last STATS_TREND_MONTHS calendar months, this one included
+    """
+    now = datetime.now(timezone.utc)
+    month_index = now.year * 12 + now.month - current_app.config['STATS_TREND_MONTHS']
+    return f'{month_index // 12:04d}-{month_index % 12 + 1:02d}'
+
+
+def _trend(buckets, mean):
+    """
+    Builds the trend from (month, count, score sum) buckets in ascending month order
+    'change' is the mean over the window minus the all-time mean (positive when recent reviews are better)
+    """
+    count = sum(bucket_count for _, bucket_count, _ in buckets)
+    recent_mean = _mean(count, sum(score_sum for _, _, score_sum in buckets))
+    return {
+        "months": [{"month": month, "count": bucket_count, "mean": _mean(bucket_count, score_sum)}
+                   for month, bucket_count, score_sum in buckets],
+        "count": count,
+        "mean": recent_mean,
+        "change": round(recent_mean - mean, 2) if recent_mean is not None and mean is not None else None
+    }
+
+
+def _catalog_totals():
+    """
+    Summed histogram of every sitcom, one aggregate over sitcom_stats (one row per reviewed sitcom)
+    """
+    row = db.session.execute(select(
+        *[func.coalesce(func.sum(getattr(SitcomStats, f'score_{score}')), 0) for score in SCORES]
+    )).one()
+    histogram = {str(score): int(count) for score, count in zip(SCORES, row)}
+    count = sum(histogram.values())
+    score_sum = sum(int(score) * value for score, value in histogram.items())
+    return histogram, count, _mean(count, score_sum)
+
+
+def _prior_mean():
+    """
+    Catalog mean used as the prior of per-sitcom weighted ratings, recomputed at most every STATS_PRIOR_TTL
+    seconds per process: it moves slowly, and aggregating every sitcom on each stats request would scan the table
+    """
+    now = time.monotonic()
+    cached = current_app.extensions.get('stats_prior_mean')
+    if cached and cached[0] > now:
+        return cached[1]
+    _, _, mean = _catalog_totals()
+    current_app.extensions['stats_prior_mean'] = (now + current_app.config['STATS_PRIOR_TTL'], mean)
+    return mean
+
+
+def _stats_response(name, stats):
+    """
+    Returns the statistics as JSON with an ETag derived from their values, or a 304 when it still matches
+    The statistics are aggregates rather than rows, so they have no version or Last-Modified of their own
+    """
+    etag = make_etag(name, json.dumps(stats, sort_keys=True))
+    not_modified = not_modified_response(etag, None)
+    if not_modified:
+        return not_modified
+    return add_validators(jsonify(stats), etag, None), 200
+
+# READ the review statistics of a sitcom
+@stats_bp.route('/sitcoms/<int:sitcom_id>/stats', methods=['GET'])
+@cache.cached('sitcom:{sitcom_id}')
+def get_sitcom_stats(sitcom_id):
+    """
+    GET the score histogram, review count, mean, Bayesian weighted rating and recent trend of a sitcom
+    Served from the precomputed sitcom_stats and sitcom_monthly_ratings rows, never by scanning reviews
+    Cached under the sitcom's own tag only: reviews of other sitcoms just move the prior, which is
+    refreshed every STATS_PRIOR_TTL seconds anyway
+    """
+    if not db.session.query(Sitcom.id).filter_by(id=sitcom_id).first():
+        return jsonify({"message": "Sitcom not found"}), 404
+
+    stats = db.session.get(SitcomStats, sitcom_id) or SitcomStats(sitcom_id=sitcom_id, **{
+        f'score_{score}': 0 for score in SCORES
+    })
+    histogram = stats.histogram
+    count = sum(histogram.values())
+    score_sum = sum(int(score) * value for score, value in histogram.items())
+    mean = _mean(count, score_sum)
+
+    buckets = db.session.execute(
+        select(SitcomMonthlyRating.month, SitcomMonthlyRating.review_count, SitcomMonthlyRating.score_sum)
+        .where(SitcomMonthlyRating.sitcom_id == sitcom_id, SitcomMonthlyRating.month >= _trend_start(),
+               SitcomMonthlyRating.review_count > 0)
+        .order_by(SitcomMonthlyRating.month)
+    ).all()
+
+    return _stats_response('sitcom_stats', {
+        "sitcom_id": sitcom_id,
+        "count": count,
+        "histogram": histogram,
+        "mean": mean,
+        "weighted_rating": _weighted_rating(count, score_sum, _prior_mean()),
+        "trend": _trend(buckets, mean)
+    })
+
+# READ the review statistics of the whole catalog
+@stats_bp.route('/stats', methods=['GET'])
+@cache.cached('sitcoms:by-rating', 'sitcoms')
+def get_catalog_stats():
+    """
+    GET the catalog-wide score histogram, review count, mean and recent trend,
+    plus the STATS_TOP_LIMIT sitcoms with the highest Bayesian weighted rating
+    """
+    histogram, count, mean = _catalog_totals()
+
+    month_count = func.sum(SitcomMonthlyRating.review_count)
+    buckets = db.session.execute(
+        select(SitcomMonthlyRating.month, month_count, func.sum(SitcomMonthlyRating.score_sum))
+        .where(SitcomMonthlyRating.month >= _trend_start())
+        .group_by(SitcomMonthlyRating.month)
+        .having(month_count > 0)
+        .order_by(SitcomMonthlyRating.month)
+    ).all()
+
+    top_rated = []
+    if mean is not None:
+        weight = current_app.config['STATS_PRIOR_WEIGHT']
+        weighted = (weight * mean + SCORE_SUM) / (weight + REVIEW_COUNT)
+        rows = db.session.execute(
+            select(SitcomStats.sitcom_id, Sitcom.title, REVIEW_COUNT, SCORE_SUM)
+            .join(Sitcom, Sitcom.id == SitcomStats.sitcom_id)
+            .where(REVIEW_COUNT > 0)
+            .order_by(weighted.desc(), SitcomStats.sitcom_id)
+            .limit(current_app.config['STATS_TOP_LIMIT'])
+        ).all()
+        top_rated = [{
+            "sitcom_id": sitcom_id,
+            "title": title,
+            "count": sitcom_count,
+            "mean": _mean(sitcom_count, score_sum),
+            "weighted_rating": _weighted_rating(sitcom_count, score_sum, mean)
+        } for sitcom_id, title, sitcom_count, score_sum in rows]
+
+    return _stats_response('catalog_stats', {
+        "count": count,
+        "histogram": histogram,
+        "mean": mean,
+        "trend": _trend([(month, int(c), int(s)) for month, c, s in buckets], mean),
+        "top_rated": top_rated
+    })
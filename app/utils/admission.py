@@ -0,0 +1,244 @@
+# app/utils/admission.py
+import math
+import threading
+import time
+from collections import OrderedDict
+from importlib import import_module
+from flask import g, jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+
+# Endpoints that hash passwords; they get their own concurrency class so logins cannot starve reads and writes
+AUTH_ENDPOINTS = {'auth.register_user', 'auth.login_user'}
+# Endpoints that are never limited: the liveness page, the metrics (off by default, token or IP protected) and static files
+EXEMPT_ENDPOINTS = {'hello_sitcomverse', 'metrics.get_metrics', 'static'}
+
+
+def route_class(endpoint, method):
+    """
+    Concurrency class of a request: 'auth' (password hashing), 'read' (GET/HEAD) or 'write'
+    """
+    if endpoint in AUTH_ENDPOINTS:
+        return 'auth'
+    return 'read' if method in ('GET', 'HEAD', 'OPTIONS') else 'write'
+
+
+class ConcurrencyLimiter:
+    """
+    At most 'limit' requests of one class run at once; up to 'queue_depth' more wait up to 'timeout' seconds
+    for a slot, and the rest are refused straight away. A limit of 0 admits everything
+    """
+
+    def __init__(self, limit, queue_depth, timeout):
+        self.limit = limit
+        self.queue_depth = queue_depth
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(limit) if limit else None
+        self._lock = threading.Lock()
+        self._counters = {'in_flight': 0, 'waiting': 0, 'admitted': 0, 'queued': 0, 'rejected': 0, 'timed_out': 0}
+
+    def acquire(self):
+        """
+        Takes a slot, waiting in the queue when needed; returns False when the request must be shed
+        """
+        if self._slots is None:
+            return True
+        admitted = self._slots.acquire(blocking=False)
+        if not admitted:
+            with self._lock:
+                if self._counters['waiting'] >= self.queue_depth:
+                    self._counters['rejected'] += 1
+                    return False
+                self._counters['waiting'] += 1
+                self._counters['queued'] += 1
+            try:
+                admitted = self._slots.acquire(timeout=self.timeout)
+            finally:
+                with self._lock:
+                    self._counters['waiting'] -= 1
+            if not admitted:
+                with self._lock:
+                    self._counters['timed_out'] += 1
+                return False
+        with self._lock:
+            self._counters['in_flight'] += 1
+            self._counters['admitted'] += 1
+        return True
+
+    def release(self):
+        if self._slots is None:
+            return
+        with self._lock:
+            self._counters['in_flight'] -= 1
+        self._slots.release()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counters, limit=self.limit, queue_depth=self.queue_depth)
+
+
+class RateLimitStore:
+    """
+    Interface of the token bucket store; subclass it for a store shared by every worker (e.g., Redis)
+    and set RATE_LIMIT_STORE to its 'module:Class' path
+    """
+
+    def __init__(self, app):
+        pass
+
+    def take(self, key, capacity, rate):
+        """
+        Takes one token from the bucket 'key' (holding up to 'capacity' tokens, refilled at 'rate' per second)
+        Returns (allowed, seconds until a token is available)
+        """
+        raise NotImplementedError
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """
+    Per-process token buckets (RATE_LIMIT_STORE = 'memory'); the least recently used buckets are dropped
+    beyond RATE_LIMIT_MAX_KEYS, which only resets them to full
+    """
+
+    def __init__(self, app):
+        self.max_keys = app.config['RATE_LIMIT_MAX_KEYS']
+        self._buckets = OrderedDict() # key -> [tokens, last refill (monotonic seconds)]
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate):
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.pop(key, None) or [capacity, now]
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            allowed = bucket[0] >= 1
+            if allowed:
+                bucket[0] -= 1
+            self._buckets[key] = bucket
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return allowed, 0 if allowed else (1 - bucket[0]) / rate
+
+
+STORES = {
+    'memory': MemoryRateLimitStore
+}
+
+
+def parse_rate(value):
+    """
+    Parses 'requests/seconds' (e.g. '10/60') into a (capacity, tokens per second) pair
+    """
+    requests, _, seconds = value.partition('/')
+    capacity, seconds = int(requests), float(seconds or 1)
+    if capacity < 1 or seconds <= 0:
+        raise ValueError(f"Invalid rate limit '{value}': expected requests/seconds, e.g. 10/60")
+    return capacity, capacity / seconds
+
+
+def parse_rate_limits(value):
+    """
+    Parses RATE_LIMITS ('endpoint=requests/seconds' pairs separated by commas) into {endpoint: (capacity, rate)}
+    """
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        endpoint, _, rate = item.partition('=')
+        limits[endpoint.strip()] = parse_rate(rate.strip())
+    return limits
+
+
+class _AdmissionState:
+    """
+    Per-application limiters, rate limit rules and token bucket store
+    """
+
+    def __init__(self, app):
+        config = app.config
+        queue_depth, timeout = config['ADMISSION_QUEUE_DEPTH'], config['ADMISSION_QUEUE_TIMEOUT']
+        self.enabled = config['ADMISSION_ENABLED']
+        self.limiters = {
+            'read': ConcurrencyLimiter(config['ADMISSION_READ_LIMIT'], queue_depth, timeout),
+            'write': ConcurrencyLimiter(config['ADMISSION_WRITE_LIMIT'], queue_depth, timeout),
+            'auth': ConcurrencyLimiter(config['ADMISSION_AUTH_LIMIT'], queue_depth, timeout)
+        }
+        self.retry_after = config['ADMISSION_RETRY_AFTER']
+
+        self.rate_limits = parse_rate_limits(config['RATE_LIMITS'])
+        self.default_rate = parse_rate(config['RATE_LIMIT_DEFAULT']) if config['RATE_LIMIT_DEFAULT'] else None
+        name = config['RATE_LIMIT_STORE']
+        if name in STORES:
+            store_class = STORES[name]
+        else:
+            module_name, _, class_name = name.partition(':')
+            store_class = getattr(import_module(module_name), class_name)
+        self.store = store_class(app)
+        self._limited = 0
+        self._lock = threading.Lock()
+
+    def count_limited(self):
+        with self._lock:
+            self._limited += 1
+
+    def snapshot(self):
+        with self._lock:
+            limited = self._limited
+        return {
+            "enabled": self.enabled,
+            "classes": {name: limiter.snapshot() for name, limiter in self.limiters.items()},
+            "rate_limited": limited
+        }
+
+
+def _client_key():
+    """
+    Identifies the caller for rate limiting: the JWT identity when a valid token is sent, else the client IP
+    Behind proxies remote_addr is the proxy's unless PROXY_FIX_X_FOR restores the client's (see create_app)
+    """
+    try:
+        if verify_jwt_in_request(optional=True):
+            return f'user:{get_jwt_identity()}'
+    except Exception: # Invalid or expired token: the view rejects it, the rate limit falls back to the IP
+        pass
+    return f'ip:{request.remote_addr}'
+
+
+def _busy_response(message, retry_after):
+    response = jsonify({"message": message})
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def init_admission(app):
+    """
+    Registers the rate limit and admission control hooks; state and counters live in app.extensions['admission']
+    Rate limits answer 429, full concurrency classes 503, both with Retry-After and before the view touches the database
+    """
+    state = _AdmissionState(app)
+    app.extensions['admission'] = state
+
+    @app.before_request
+    def admit_request():
+        endpoint = request.endpoint
+        if not state.enabled or endpoint is None or endpoint in EXEMPT_ENDPOINTS:
+            return None
+
+        rate = state.rate_limits.get(endpoint, state.default_rate)
+        if rate:
+            allowed, retry_after = state.store.take(f'{endpoint}:{_client_key()}', *rate)
+            if not allowed:
+                state.count_limited()
+                return _busy_response("Too Many Requests: rate limit exceeded, please retry later", retry_after), 429
+
+        limiter = state.limiters[route_class(endpoint, request.method)]
+        if not limiter.acquire():
+            return _busy_response("Service busy: too many concurrent requests, please retry shortly",
+                                  state.retry_after), 503
+        g.admission_limiter = limiter
+        return None
+
+    @app.teardown_request
+    def release_slot(exception):
+        # Runs once the response is sent (streamed responses included), however the view ended
+        limiter = g.pop('admission_limiter', None)
+        if limiter is not None:
+            limiter.release()
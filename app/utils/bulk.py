@@ -0,0 +1,74 @@
+# app/utils/bulk.py
+from flask import current_app, request
+from sqlalchemy import insert, text
+from app import db
+
+
+class BulkRequestError(ValueError):
+    """
+    Raised when the body of a bulk request is not a usable JSON array
+    """
+
+
+def get_bulk_items():
+    """
+    Reads the JSON array sent to a bulk endpoint and checks it against BULK_MAX_ITEMS
+    """
+    items = request.get_json(silent=True)
+    if not isinstance(items, list) or not items:
+        raise BulkRequestError("Expected a non-empty JSON array of items")
+
+    max_items = current_app.config['BULK_MAX_ITEMS']
+    if len(items) > max_items:
+        raise BulkRequestError(f"A bulk request can contain at most {max_items} items")
+    return items
+
+
+def chunked(items, size):
+    """
+    Splits a list into consecutive slices of at most 'size' elements
+    """
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def insert_rows(model, rows):
+    """
+    Inserts rows (a list of column dictionaries) with chunked multi-row INSERT statements
+    Runs in the current transaction; the caller commits
+    Returns the new primary keys in input order:
+    - read back with RETURNING where the database supports it (SQLite, PostgreSQL, MariaDB)
+    - on MySQL, counted from the first id of each INSERT (LAST_INSERT_ID): InnoDB hands the rows of one
+      multi-row INSERT consecutive ids, auto_increment_increment apart, under every innodb_autoinc_lock_mode
+    - elsewhere, one INSERT per row
+    """
+    dialect = db.session.get_bind().dialect
+    ids = []
+    if dialect.insert_executemany_returning_sort_by_parameter_order:
+        for chunk in chunked(rows, current_app.config['BULK_CHUNK_SIZE']):
+            statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+            ids.extend(db.session.execute(statement, chunk).scalars().all())
+    elif dialect.name == 'mysql':
+        step = db.session.execute(text('SELECT @@auto_increment_increment')).scalar()
+        for chunk in chunked(rows, current_app.config['BULK_CHUNK_SIZE']):
+            # One statement per chunk: an executemany could be split by the driver, leaving only the last first id
+            first_id = db.session.execute(insert(model).values(chunk)).lastrowid
+            ids.extend(first_id + i * step for i in range(len(chunk)))
+    else:
+        for row in rows:
+            ids.append(db.session.execute(insert(model).values(row)).inserted_primary_key[0])
+    return ids
+
+
+def bulk_response(results):
+    """
+    Builds the (body, status) pair returned by bulk endpoints
+    Every item gets its own result entry; the status is 201 when all items were created, 207 otherwise
+    """
+    created = sum(1 for result in results if result['status'] == 201)
+    body = {
+        "created": created,
+        "failed": len(results) - created,
+        "results": results
+    }
+    return body, 201 if created == len(results) else 207
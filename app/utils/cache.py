@@ -0,0 +1,205 @@
+# app/utils/cache.py
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from functools import wraps
+from importlib import import_module
+from flask import Response, current_app, g, make_response, request
+from app.utils.conditional import add_validators, not_modified_response
+
+
+class CacheBackend:
+    """
+    Storage interface of the response cache
+    Subclass it to plug in a shared store (e.g., Redis or Memcached) and point CACHE_BACKEND at the class
+    Values are plain tuples so shared backends can pickle them
+    """
+
+    def get(self, key):
+        """
+        Returns the cached value for key, or None on a miss
+        """
+        raise NotImplementedError
+
+    def set(self, key, value, ttl, tags):
+        """
+        Stores value under key for ttl seconds, indexed by the given invalidation tags
+        """
+        raise NotImplementedError
+
+    def invalidate_tags(self, tags):
+        """
+        Drops every entry indexed by any of the given tags
+        """
+        raise NotImplementedError
+
+    def stats(self):
+        """
+        Returns the hit/miss/eviction counters as a dictionary
+        """
+        raise NotImplementedError
+
+
+class NullCacheBackend(CacheBackend):
+    """
+    Backend that never stores anything (CACHE_BACKEND = 'null'); every lookup is a miss
+    """
+
+    def __init__(self, app):
+        self._misses = 0
+
+    def get(self, key):
+        self._misses += 1
+        return None
+
+    def set(self, key, value, ttl, tags):
+        pass
+
+    def invalidate_tags(self, tags):
+        pass
+
+    def stats(self):
+        return {'backend': 'null', 'misses': self._misses}
+
+
+class LRUCacheBackend(CacheBackend):
+    """
+    Bounded in-process LRU cache with a per-entry TTL (CACHE_BACKEND = 'memory')
+    Each worker process keeps its own copy, so entries written by other processes expire through the TTL
+    """
+
+    def __init__(self, app):
+        self.max_entries = app.config['CACHE_MAX_ENTRIES']
+        self._entries = OrderedDict() # key -> (expires_at, value, tags), least recently used first
+        self._tag_index = defaultdict(set) # tag -> keys
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    def _remove(self, key):
+        """
+        Removes an entry and its tag index references; the lock must be held
+        """
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_index[tag]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                self._counters['expirations'] += 1
+                self._counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            return entry[1]
+
+    def set(self, key, value, ttl, tags):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, value, tuple(tags))
+            for tag in tags:
+                self._tag_index[tag].add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._counters['evictions'] += 1
+
+    def invalidate_tags(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tag_index.get(tag, ())):
+                    self._remove(key)
+                    self._counters['invalidations'] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, backend='memory', entries=len(self._entries), max_entries=self.max_entries)
+
+
+BACKENDS = {
+    'memory': LRUCacheBackend,
+    'null': NullCacheBackend
+}
+
+
+class ResponseCache:
+    """
+    Caches the rendered bodies of public GET endpoints
+    Entries carry tags (e.g. 'sitcom:1:reviews') so writes can invalidate exactly what they changed
+    """
+
+    def init_app(self, app):
+        """
+        Creates the configured backend; CACHE_BACKEND is 'memory', 'null' or a 'module:Class' path
+        """
+        name = app.config['CACHE_BACKEND']
+        if name in BACKENDS:
+            backend_class = BACKENDS[name]
+        else:
+            module_name, _, class_name = name.partition(':')
+            backend_class = getattr(import_module(module_name), class_name)
+        app.extensions['response_cache'] = backend_class(app)
+
+    @property
+    def backend(self):
+        return current_app.extensions['response_cache']
+
+    def cached(self, *tag_templates):
+        """
+        Decorator for GET views; tag templates are formatted with the view arguments
+        e.g. @cache.cached('sitcom:{sitcom_id}:reviews')
+        Views can attach more tags while they run with add_tags()
+        Only 200 responses are stored; hits still honour If-None-Match / If-Modified-Since
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                key = request.full_path
+                cached = self.backend.get(key)
+                if cached is not None:
+                    body, mimetype, etag, last_modified = cached
+                    not_modified = not_modified_response(etag, last_modified)
+                    if not_modified:
+                        return not_modified
+                    response = add_validators(Response(body, mimetype=mimetype), etag, last_modified)
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
+                g.cache_tags = [template.format(**kwargs) for template in tag_templates]
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200 and not response.is_streamed:
+                    etag, _ = response.get_etag()
+                    value = (response.get_data(), response.mimetype, etag, response.last_modified)
+                    self.backend.set(key, value, current_app.config['CACHE_TTL'], g.cache_tags)
+                    response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
+
+    def add_tags(self, *tags):
+        """
+        Adds invalidation tags to the response being cached by the current view
+        """
+        if 'cache_tags' in g:
+            g.cache_tags.extend(tags)
+
+    def invalidate(self, *tags):
+        """
+        Drops the cached responses indexed by any of the tags; call after a successful commit
+        """
+        self.backend.invalidate_tags(tags)
+
+    def stats(self):
+        return self.backend.stats()
+
+
+cache = ResponseCache()
@@ -0,0 +1,138 @@
+# app/utils/compression.py
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError: # Optional dependency; 'br' is only offered when installed
+    brotli = None
+
+try:
+    import zstandard
+except ImportError: # Optional dependency; 'zstd' is only offered when installed
+    zstandard = None
+
+
+class _GzipCompressor:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS) # gzip container
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+# Content codings this process can produce, with their compressor and level setting
+CODINGS = {'gzip': (_GzipCompressor, 'COMPRESS_LEVEL_GZIP')}
+if brotli is not None:
+    CODINGS['br'] = (_BrotliCompressor, 'COMPRESS_LEVEL_BR')
+if zstandard is not None:
+    CODINGS['zstd'] = (_ZstdCompressor, 'COMPRESS_LEVEL_ZSTD')
+
+
+def _negotiate(preference):
+    """
+    Picks the coding with the highest Accept-Encoding quality, breaking ties by server preference
+    Returns None when the client accepts none of them (or sent no Accept-Encoding)
+    """
+    best, best_quality = None, 0
+    for coding in preference:
+        quality = request.accept_encodings.quality(coding)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def _compress_stream(chunks, compressor):
+    """
+    Compresses a streamed body chunk by chunk; each chunk is flushed so clients receive it without waiting
+    for the whole stream
+    """
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            data = compressor.compress(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close:
+            close()
+
+
+def init_compression(app):
+    """
+    Compresses responses with the best coding the client accepts (zstd, br, gzip by default)
+    Buffered bodies below COMPRESS_MIN_SIZE are sent as they are; streamed bodies are compressed incrementally
+    ETags become weak on compressed responses, as the bytes differ from the identity representation
+    """
+    if not app.config['COMPRESS_ENABLED']:
+        return
+    preference = [coding.strip() for coding in app.config['COMPRESS_ALGORITHMS'].split(',') if coding.strip() in CODINGS]
+    mimetypes = set(app.config['COMPRESS_MIMETYPES'])
+
+    @app.after_request
+    def compress_response(response):
+        if response.mimetype not in mimetypes:
+            return response
+        response.vary.add('Accept-Encoding')
+
+        if (response.status_code < 200 or response.status_code in (204, 304) or request.method == 'HEAD'
+                or response.direct_passthrough or 'Content-Encoding' in response.headers):
+            return response
+        if not response.is_streamed and response.content_length is not None \
+                and response.content_length < app.config['COMPRESS_MIN_SIZE']:
+            return response
+
+        coding = _negotiate(preference)
+        if coding is None:
+            return response
+        compressor_class, level_setting = CODINGS[coding]
+        compressor = compressor_class(app.config[level_setting])
+
+        if response.is_streamed:
+            response.response = _compress_stream(response.response, compressor)
+            response.headers.pop('Content-Length', None)
+        else:
+            response.set_data(compressor.compress(response.get_data()) + compressor.finish())
+        response.headers['Content-Encoding'] = coding
+
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
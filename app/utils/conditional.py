@@ -0,0 +1,80 @@
+# app/utils/conditional.py
+import hashlib
+from datetime import timezone
+from flask import Response, request
+
+
+def make_etag(*parts):
+    """
+    Builds a strong ETag from validator parts (table, id, version, ...)
+    The query string is mixed in so different representations of a resource get different tags
+    """
+    raw = '|'.join(str(part) for part in parts) + '|' + request.query_string.decode('latin-1')
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _as_utc(value):
+    """
+    Treats naive datetimes read from the database as UTC
+    """
+    if value is not None and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def item_validators(obj):
+    """
+    Returns the (etag, last_modified) validators of a single row
+    """
+    return make_etag(obj.__tablename__, obj.id, obj.version), _as_utc(obj.updated_at)
+
+
+def page_validators(model, rows, *parts):
+    """
+    Returns the (etag, last_modified) validators of a page of rows that was already fetched
+    Each row needs id, version and updated_at; 'parts' adds the rest of the page (e.g. the next cursor)
+    The ETag costs no extra query and changes whenever the page does. last_modified is None: a row
+    dropping out of the page does not move any updated_at forward, so only If-None-Match can answer 304
+    """
+    fingerprint = [(row.id, row.version, row.updated_at) for row in rows]
+    return make_etag(model.__tablename__, fingerprint, *parts), None
+
+
+def merge_validators(*validators):
+    """
+    Combines several (etag, last_modified) pairs, e.g. a sitcom and its embedded collections, into one pair
+    last_modified is None unless every pair has one
+    """
+    etag = make_etag(*[etag for etag, _ in validators])
+    modified = [modified for _, modified in validators]
+    last_modified = max(modified) if modified and None not in modified else None
+    return etag, last_modified
+
+
+def not_modified_response(etag, last_modified):
+    """
+    Returns an empty 304 response when the request's validators still match, otherwise None
+    If-None-Match takes precedence over If-Modified-Since and uses weak comparison (RFC 9110),
+    so the weak ETags of compressed responses match too
+    """
+    if request.if_none_match:
+        matched = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since and last_modified:
+        # HTTP dates have one-second resolution
+        matched = last_modified.replace(microsecond=0) <= request.if_modified_since
+    else:
+        matched = False
+
+    if not matched:
+        return None
+    return add_validators(Response(status=304), etag, last_modified)
+
+
+def add_validators(response, etag, last_modified):
+    """
+    Sets the ETag and Last-Modified headers on a response and returns it
+    """
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    return response
@@ -0,0 +1,70 @@
+# app/utils/export.py
+import csv
+import io
+import json
+from app.models.sitcom import Sitcom
+from app.models.character import Character
+from app.models.review import Review
+
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+# Union of the columns of all exported records; the 'type' column tells them apart in CSV output
+CSV_FIELDS = [
+    'type', 'id', 'sitcom_id', 'user_id',
+    'title', 'creator', 'genre', 'years_active', 'number_of_seasons', 'synopsis', 'average_rating',
+    'name', 'actor', 'role', 'description',
+    'score', 'text',
+    'created_at', 'updated_at'
+]
+
+EXPORT_MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+
+def iter_catalog_records(batch_size):
+    """
+    Yields every sitcom, then every character, then every review as dictionaries tagged with a 'type'
+    Each table is read through a server-side cursor (yield_per), so memory stays constant
+    Characters and reviews are ordered by (sitcom_id, id) to group them by sitcom
+    """
+    sources = (
+        ('sitcom', Sitcom.query.order_by(Sitcom.id)),
+        ('character', Character.query.order_by(Character.sitcom_id, Character.id)),
+        ('review', Review.query.order_by(Review.sitcom_id, Review.id))
+    )
+    for record_type, query in sources:
+        for row in query.yield_per(batch_size):
+            yield {'type': record_type, **row.to_dict()}
+
+
+def iter_export(export_format, batch_size):
+    """
+    Yields the catalog serialized as NDJSON or CSV text chunks of about batch_size records each
+    """
+    buffer = io.StringIO()
+    writer = None
+    if export_format == 'csv':
+        writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+
+    pending = 0
+    for record in iter_catalog_records(batch_size):
+        if writer:
+            writer.writerow(record)
+        else:
+            buffer.write(json.dumps(record, separators=(',', ':')))
+            buffer.write('\n')
+
+        pending += 1
+        if pending >= batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    remaining = buffer.getvalue()
+    if remaining:
+        yield remaining
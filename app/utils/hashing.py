@@ -0,0 +1,149 @@
+# app/utils/hashing.py
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    """
+    Raised when every hashing slot (workers + queue) is taken; routes answer 503
+    """
+
+
+class PasswordHasherTimeout(PasswordHasherBusy):
+    """
+    Raised when a hash takes longer than PASSWORD_HASH_TIMEOUT; it keeps its slot until it really ends
+    """
+
+
+def canonical_method(method):
+    """
+    Werkzeug method string with the defaults it fills in, as found before the first '$' of its hashes
+    e.g. 'scrypt' -> 'scrypt:32768:8:1', 'pbkdf2' -> 'pbkdf2:sha256:1000000'
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt' and not args:
+        args = ['32768', '8', '1']
+    elif name == 'pbkdf2':
+        args = args or ['sha256']
+        if len(args) == 1:
+            args = args + [str(DEFAULT_PBKDF2_ITERATIONS)]
+    return ':'.join([name, *args])
+
+
+class _HasherState:
+    """
+    Per-application hashing pool; the process pool itself is started on first use
+    """
+
+    def __init__(self, app):
+        self.method = app.config['PASSWORD_HASH_METHOD']
+        self.workers = app.config['PASSWORD_HASH_WORKERS']
+        self.timeout = app.config['PASSWORD_HASH_TIMEOUT']
+        # Hashes running in the pool plus hashes waiting for a worker
+        self.slots = threading.BoundedSemaphore(self.workers + app.config['PASSWORD_HASH_QUEUE_DEPTH'])
+        self.method_prefix = canonical_method(self.method)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn avoids forking a multi-threaded server process
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+    def discard_pool(self, pool):
+        """
+        Drops a broken pool (e.g. a worker was killed for memory) so the next hash starts a fresh one
+        """
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+class PasswordHasher:
+    """
+    Runs Werkzeug password hashing off the request thread in a bounded process pool
+    PASSWORD_HASH_WORKERS = 0 hashes on the calling thread (still bounded by the queue depth)
+    """
+
+    def init_app(self, app):
+        app.extensions['password_hasher'] = _HasherState(app)
+
+    @property
+    def _state(self):
+        return current_app.extensions['password_hasher']
+
+    def _run(self, function, *args):
+        """
+        Runs function(*args) in the pool, or raises PasswordHasherBusy straight away when it is full
+        Raises PasswordHasherTimeout after PASSWORD_HASH_TIMEOUT seconds, and PasswordHasherBusy when
+        a worker died (the pool is then rebuilt for the next call)
+        """
+        state = self._state
+        if not state.slots.acquire(blocking=False):
+            raise PasswordHasherBusy("Password hashing capacity exceeded")
+        if state.workers == 0:
+            try:
+                return function(*args)
+            finally:
+                state.slots.release()
+
+        pool = state.pool
+        try:
+            future = pool.submit(function, *args)
+        except BrokenProcessPool:
+            state.slots.release()
+            state.discard_pool(pool)
+            raise PasswordHasherBusy("Password hashing worker died; restarting the pool")
+        except Exception:
+            state.slots.release()
+            raise
+        # The slot is held until the hash really ends, so requests that gave up waiting still count against it
+        future.add_done_callback(lambda _: state.slots.release())
+        try:
+            return future.result(timeout=state.timeout)
+        except FutureTimeoutError:
+            future.cancel() # Only succeeds while the hash is still queued; a running one keeps its slot
+            raise PasswordHasherTimeout(f"Password hashing took longer than {state.timeout} seconds")
+        except BrokenProcessPool:
+            state.discard_pool(pool)
+            raise PasswordHasherBusy("Password hashing worker died; restarting the pool")
+
+    def hash(self, password):
+        """
+        Hashes a password with the configured PASSWORD_HASH_METHOD
+        """
+        return self._run(generate_password_hash, password, self._state.method)
+
+    def verify(self, password_hash, password):
+        """
+        Checks a password against a stored hash (whatever method produced it)
+        """
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """
+        True when a stored hash was produced with a method or cost other than PASSWORD_HASH_METHOD
+        """
+        # Compares the stored parameters with the setting (defaults filled in), without hashing anything
+        return password_hash.split('$', 1)[0] != self._state.method_prefix
+
+    def warm_up(self):
+        """
+        Starts every worker process (and its Werkzeug import) ahead of the first login
+        """
+        state = self._state
+        if state.workers:
+            futures = [state.pool.submit(generate_password_hash, '', 'pbkdf2:sha256:1') for _ in range(state.workers)]
+            for future in futures:
+                future.result(timeout=state.timeout)
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,99 @@
+# app/utils/include.py
+from flask import current_app, request
+from sqlalchemy import func, select
+from app import db
+from app.models.character import Character
+from app.models.review import Review
+from app.models.user import User
+from app.utils.conditional import page_validators
+
+
+# Related collections a sitcom can embed with ?include=, and the order their capped items are picked in
+INCLUDES = {
+    'characters': (Character, Character.id.asc()),
+    'reviews': (Review, Review.id.desc()) # Most recent reviews first
+}
+
+
+class IncludeError(ValueError):
+    """
+    Raised when ?include= names an unknown relationship
+    """
+
+
+def get_includes():
+    """
+    Reads ?include=characters,reviews
+    Returns the requested relationship names (empty when the parameter is absent)
+    """
+    raw = request.args.get('include')
+    if raw is None:
+        return []
+    includes = list(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    unknown = [name for name in includes if name not in INCLUDES]
+    if unknown or not includes:
+        raise IncludeError(f"include must be a comma-separated list of: {', '.join(INCLUDES)}")
+    return includes
+
+
+def _capped_statement(model, order, sitcom_ids, limit):
+    """
+    Selects at most 'limit' rows of 'model' per sitcom, each with its sitcom's total row count
+    A window function numbers the rows of every sitcom, so the cap is applied in SQL however many sitcoms there are
+    """
+    numbered = select(
+        model.id,
+        func.row_number().over(partition_by=model.sitcom_id, order_by=order).label('position'),
+        func.count().over(partition_by=model.sitcom_id).label('total')
+    ).where(model.sitcom_id.in_(sitcom_ids)).subquery()
+    return select(model, numbered.c.total) \
+        .join(numbered, numbered.c.id == model.id) \
+        .where(numbered.c.position <= limit) \
+        .order_by(model.sitcom_id, numbered.c.position)
+
+
+def embed_includes(sitcom_data, includes):
+    """
+    Adds the requested related collections to serialized sitcoms (dictionaries keyed by sitcom id)
+    Each collection costs one query for the whole page: 'characters' / 'reviews' hold at most
+    INCLUDE_MAX_ITEMS items, 'characters_total' / 'reviews_total' the full counts; reviews carry
+    their author (joined in the same query)
+    Returns the (etag, last_modified) validators of each embedded collection, built from the rows it embedded
+    """
+    limit = current_app.config['INCLUDE_MAX_ITEMS']
+    sitcom_ids = list(sitcom_data)
+    for name in includes:
+        for data in sitcom_data.values():
+            data[name], data[f'{name}_total'] = [], 0
+
+    validators = []
+    if 'characters' in includes:
+        characters = []
+        if sitcom_ids:
+            statement = _capped_statement(Character, INCLUDES['characters'][1], sitcom_ids, limit)
+            for character, total in db.session.execute(statement):
+                data = sitcom_data[character.sitcom_id]
+                data['characters'].append(character.to_dict())
+                data['characters_total'] = total
+                characters.append(character)
+        validators.append(page_validators(Character, characters, _totals(sitcom_data, 'characters')))
+
+    if 'reviews' in includes:
+        reviews = []
+        if sitcom_ids:
+            statement = _capped_statement(Review, INCLUDES['reviews'][1], sitcom_ids, limit) \
+                .add_columns(User.username).join(User, User.id == Review.user_id)
+            for review, total, username in db.session.execute(statement):
+                data = sitcom_data[review.sitcom_id]
+                data['reviews'].append(dict(review.to_dict(), author={'id': review.user_id, 'username': username}))
+                data['reviews_total'] = total
+                reviews.append(review)
+        validators.append(page_validators(Review, reviews, _totals(sitcom_data, 'reviews')))
+    return validators
+
+
+def _totals(sitcom_data, name):
+    """
+    Full row counts of an embedded collection per sitcom; a row beyond the cap changes them, not the items
+    """
+    return [(sitcom_id, data[f'{name}_total']) for sitcom_id, data in sitcom_data.items()]
@@ -0,0 +1,72 @@
+# app/utils/json_provider.py
+from datetime import date
+from importlib import import_module
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+try:
+    import orjson
+except ImportError: # Optional dependency; the stdlib provider is used without it
+    orjson = None
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """
+    Flask's default provider, except that dates and datetimes become ISO 8601 strings (as with orjson)
+    instead of HTTP dates, so row serializers can hand over datetimes untouched
+    """
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, date):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+
+class OrjsonJSONProvider(JSONProvider):
+    """
+    JSON provider backed by orjson: serializes dicts, lists, datetimes and dataclasses natively in C
+    Keys are sorted like Flask's default provider, so responses (and their ETags) do not change
+    """
+    sort_keys = True
+
+    def _option(self):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=StdlibJSONProvider.default, option=self._option()).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=StdlibJSONProvider.default, option=self._option())
+        return self._app.response_class(body, mimetype='application/json')
+
+
+PROVIDERS = {
+    'stdlib': StdlibJSONProvider,
+    'orjson': OrjsonJSONProvider
+}
+
+
+def init_json_provider(app):
+    """
+    Installs the JSON provider named by JSON_PROVIDER: 'auto' (orjson when installed, else stdlib),
+    'orjson', 'stdlib', or a 'module:Class' path to a flask.json.provider.JSONProvider subclass
+    """
+    name = app.config['JSON_PROVIDER']
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'stdlib'
+    if name == 'orjson' and orjson is None:
+        raise RuntimeError("JSON_PROVIDER is 'orjson' but the orjson package is not installed")
+
+    if name in PROVIDERS:
+        provider_class = PROVIDERS[name]
+    else:
+        module_name, _, class_name = name.partition(':')
+        provider_class = getattr(import_module(module_name), class_name)
+    app.json = provider_class(app)
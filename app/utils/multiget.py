@@ -0,0 +1,38 @@
+# app/utils/multiget.py
+from flask import current_app, request
+
+
+class IdsError(ValueError):
+    """
+    Raised when ?ids= is not a usable list of integer IDs
+    """
+
+
+def get_ids():
+    """
+    Reads ?ids=1,2,3 for multi-get endpoints and checks it against MULTI_GET_MAX_IDS
+    Returns the IDs in request order (duplicates kept, so the response lines up with the request)
+    """
+    raw = request.args.get('ids', '')
+    try:
+        ids = [int(part) for part in raw.split(',') if part.strip()]
+    except ValueError:
+        raise IdsError("ids must be a comma-separated list of integers")
+    if not ids:
+        raise IdsError("ids must contain at least one ID")
+
+    max_ids = current_app.config['MULTI_GET_MAX_IDS']
+    if len(set(ids)) > max_ids:
+        raise IdsError(f"ids can contain at most {max_ids} distinct IDs")
+    return ids
+
+
+def multi_get_response(ids, found):
+    """
+    Builds the body of a multi-get: one item per requested ID, in request order, null when the ID does not exist
+    'found' maps each existing ID to its serialized object; missing IDs are also listed under 'missing'
+    """
+    return {
+        "items": [found.get(item_id) for item_id in ids],
+        "missing": list(dict.fromkeys(item_id for item_id in ids if item_id not in found))
+    }
@@ -0,0 +1,112 @@
+# app/utils/pagination.py
+import base64
+import binascii
+import json
+from datetime import datetime
+from flask import current_app, request
+from sqlalchemy import and_, or_
+
+
+# JSON types a cursor value may arrive as, per column python_type (a float can be encoded as an integer, e.g. 4.0 as 4)
+_CURSOR_VALUE_TYPES = {float: (int, float), datetime: (str,)}
+
+
+class PaginationError(ValueError):
+    """
+    Raised when the 'limit' or 'cursor' query parameters are invalid
+    """
+
+
+def get_page_args():
+    """
+    Reads and validates the 'limit' and 'cursor' query parameters
+    Returns a (limit, cursor) tuple; cursor is None for the first page
+    """
+    max_limit = current_app.config['PAGINATION_MAX_LIMIT']
+    limit = request.args.get('limit', current_app.config['PAGINATION_DEFAULT_LIMIT'])
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise PaginationError("Limit must be an integer")
+    if not (1 <= limit <= max_limit):
+        raise PaginationError(f"Limit must be between 1 and {max_limit}")
+    return limit, request.args.get('cursor') or None
+
+
+def _sort_signature(order_by):
+    """
+    Names the ordering of a page (e.g. ['-rating_avg', 'id']) so cursors can be checked against it
+    """
+    return [('-' if descending else '') + column.key for column, descending in order_by]
+
+
+def encode_cursor(order_by, values):
+    """
+    Encodes the sort key values of the last row of a page into an opaque cursor string
+    The sort signature is included so a cursor cannot be replayed against another ordering
+    """
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps([_sort_signature(order_by), values], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, order_by):
+    """
+    Decodes a cursor produced by encode_cursor() back into values for the given ordering
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        keys, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        raise PaginationError("Invalid cursor")
+    if keys != _sort_signature(order_by) or not isinstance(values, list) or len(values) != len(order_by):
+        raise PaginationError("Cursor does not match the requested sort order")
+
+    # Check every value against its column type, so a crafted cursor cannot reach the database driver
+    # None is refused too: the seek condition compares with < and >, which NULL does not support
+    decoded = []
+    for (column, _), value in zip(order_by, values):
+        python_type = column.type.python_type
+        if (not isinstance(value, _CURSOR_VALUE_TYPES.get(python_type, (python_type,)))
+                or (isinstance(value, bool) and python_type is not bool)):
+            raise PaginationError("Invalid cursor")
+        if python_type is datetime:
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                raise PaginationError("Invalid cursor")
+        decoded.append(value)
+    return decoded
+
+
+def _seek_condition(order_by, values):
+    """
+    Builds the WHERE clause that selects the rows strictly after 'values' in the given ordering
+    Expands (a, b) > (x, y) into a > x OR (a = x AND b > y) so mixed directions are supported
+    """
+    clauses = []
+    for i, (column, descending) in enumerate(order_by):
+        equal_prefix = [order_by[j][0] == values[j] for j in range(i)]
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
+
+
+def keyset_page(query, order_by, limit, cursor=None):
+    """
+    Fetches one page of 'query' using keyset (seek) pagination instead of OFFSET
+    order_by is a list of (column, descending) pairs and must end with a unique column such as the id
+    Returns the items of the page and the cursor of the next page (None on the last page)
+    """
+    columns = [column for column, _ in order_by]
+    if cursor:
+        query = query.filter(_seek_condition(order_by, decode_cursor(cursor, order_by)))
+    query = query.order_by(*[column.desc() if descending else column.asc() for column, descending in order_by])
+
+    # Fetch one extra row to know whether another page exists
+    items = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(order_by, [getattr(items[-1], column.key) for column in columns])
+    return items, next_cursor
@@ -0,0 +1,124 @@
+# app/utils/pool_metrics.py
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+# Options that only QueuePool understands (SQLite in-memory databases use StaticPool)
+QUEUE_POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout')
+
+
+class PoolMetrics:
+    """
+    Connection pool counters and a checkout wait-time histogram for one worker process
+    """
+
+    # Upper bounds (milliseconds) of the wait-time histogram buckets; the last bucket is +Inf
+    BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {'connections_created': 0, 'connections_invalidated': 0, 'checkouts': 0, 'checkins': 0, 'checkout_timeouts': 0}
+        self.in_use = 0
+        self.wait_buckets = [0] * (len(self.BUCKETS_MS) + 1)
+        self.wait_count = 0
+        self.wait_sum_ms = 0.0
+
+    def increment(self, name):
+        with self._lock:
+            self.counters[name] += 1
+            if name == 'checkouts':
+                self.in_use += 1
+            elif name == 'checkins':
+                self.in_use -= 1
+
+    def observe_wait(self, seconds):
+        """
+        Records how long a caller waited to get a connection from the pool
+        """
+        milliseconds = seconds * 1000
+        index = next((i for i, bound in enumerate(self.BUCKETS_MS) if milliseconds <= bound), len(self.BUCKETS_MS))
+        with self._lock:
+            self.wait_buckets[index] += 1
+            self.wait_count += 1
+            self.wait_sum_ms += milliseconds
+
+    def snapshot(self, pool):
+        """
+        Returns the counters plus the live pool status as a dictionary
+        """
+        with self._lock:
+            # Cumulative buckets as a list, so JSON key sorting cannot scramble their order
+            cumulative, buckets = 0, []
+            for bound, count in zip([*map(str, self.BUCKETS_MS), '+Inf'], self.wait_buckets):
+                cumulative += count
+                buckets.append({'le': bound, 'count': cumulative})
+            data = dict(
+                self.counters,
+                checked_out=self.in_use,
+                checkout_wait_ms={'buckets': buckets, 'count': self.wait_count, 'sum': round(self.wait_sum_ms, 3)}
+            )
+        data['pool_class'] = type(pool).__name__
+        if isinstance(pool, QueuePool):
+            data.update(pool_size=pool.size(), overflow=pool.overflow(), idle=pool.checkedin())
+        return data
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that times every checkout (waiting for a free slot, opening and pre-pinging a connection)
+    """
+
+    metrics = None
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            if self.metrics is not None:
+                self.metrics.increment('checkout_timeouts')
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe_wait(time.perf_counter() - started)
+
+    def recreate(self):
+        # The engine swaps in a fresh pool on dispose(); keep reporting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def configure_engine_options(app):
+    """
+    Adjusts SQLALCHEMY_ENGINE_OPTIONS for the configured database before Flask-SQLAlchemy creates the engine
+    Server databases get the instrumented QueuePool; in-memory SQLite keeps its own pool and drops the sizing options
+    """
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        for name in QUEUE_POOL_OPTIONS:
+            options.pop(name, None)
+    else:
+        options.setdefault('poolclass', InstrumentedQueuePool)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def init_pool_metrics(app, engine):
+    """
+    Hooks the pool events of the engine and stores the metrics in app.extensions['pool_metrics']
+    """
+    metrics = PoolMetrics()
+    if isinstance(engine.pool, InstrumentedQueuePool):
+        engine.pool.metrics = metrics
+
+    event.listen(engine, 'connect', lambda *args: metrics.increment('connections_created'))
+    event.listen(engine, 'checkout', lambda *args: metrics.increment('checkouts'))
+    event.listen(engine, 'checkin', lambda *args: metrics.increment('checkins'))
+    event.listen(engine, 'invalidate', lambda *args: metrics.increment('connections_invalidated'))
+    app.extensions['pool_metrics'] = metrics
+    return metrics
@@ -0,0 +1,253 @@
+# app/utils/purge.py
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from flask import current_app, has_app_context
+from sqlalchemy import delete, event, inspect, select, text, update
+from sqlalchemy.orm import with_loader_criteria
+from app import db
+from app.models.change_log import ChangeLog
+from app.models.character import Character
+from app.models.review import Review
+from app.models.sitcom import Sitcom
+from app.models.sitcom_purge import SitcomPurge
+from app.utils.cache import cache
+
+
+logger = logging.getLogger('sitcomverse.purge')
+
+# Child tables whose sitcom_id foreign key deletes the rows with their sitcom
+CASCADE_TABLES = ('characters', 'reviews')
+
+# Dialects that can change a foreign key in place; SQLite would have to rebuild the table
+ALTER_FOREIGN_KEY = {
+    'mysql': 'ALTER TABLE {table} DROP FOREIGN KEY {name}, ADD CONSTRAINT {name} '
+             'FOREIGN KEY (sitcom_id) REFERENCES sitcoms (id) ON DELETE CASCADE',
+    'postgresql': 'ALTER TABLE {table} DROP CONSTRAINT {name}, ADD CONSTRAINT {name} '
+                  'FOREIGN KEY (sitcom_id) REFERENCES sitcoms (id) ON DELETE CASCADE'
+}
+
+
+def enable_foreign_keys(engine):
+    """
+    Turns on foreign key enforcement (and so ON DELETE CASCADE) for every SQLite connection
+    SQLite leaves it off per connection; server databases always enforce foreign keys
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
+
+def add_delete_cascades():
+    """
+    Recreates the sitcom_id foreign keys of an existing MySQL or PostgreSQL database with ON DELETE CASCADE
+    Tables created by this version already have them; returns the names of the tables that were changed
+    Callers check ALTER_FOREIGN_KEY first: other dialects cannot alter a foreign key in place
+    """
+    statement = ALTER_FOREIGN_KEY[db.session.get_bind().dialect.name]
+    changed = []
+    inspector = inspect(db.session.connection())
+    for table in CASCADE_TABLES:
+        for foreign_key in inspector.get_foreign_keys(table):
+            if foreign_key['constrained_columns'] != ['sitcom_id']:
+                continue
+            if (foreign_key.get('options') or {}).get('ondelete', '').upper() == 'CASCADE':
+                continue
+            db.session.execute(text(statement.format(table=table, name=foreign_key['name'])))
+            changed.append(table)
+    return changed
+
+
+def count_children(sitcom):
+    """
+    Characters plus reviews that deleting the sitcom removes (the review count comes from the rating aggregates)
+    """
+    characters = db.session.scalar(select(db.func.count(Character.id)).where(Character.sitcom_id == sitcom.id))
+    return characters + sitcom.rating_count
+
+
+def purge_sitcom(sitcom_id, chunk_size):
+    """
+    Deletes the reviews and characters of a sitcom 'chunk_size' rows per transaction, then the sitcom itself
+    Each transaction is short, so no lock is held for long; safe to run again after an interruption
+    """
+    for model in (Review, Character):
+        while True:
+            statement = select(model.id).where(model.sitcom_id == sitcom_id).limit(chunk_size)
+            ids = db.session.scalars(statement.execution_options(include_purging=True)).all()
+            if not ids:
+                break
+            db.session.execute(delete(model).where(model.id.in_(ids)).execution_options(include_purging=True))
+            db.session.commit()
+
+    # The remaining rows (statistics, the purge record) go with the sitcom through ON DELETE CASCADE
+    statement = delete(Sitcom).where(Sitcom.id == sitcom_id).execution_options(include_purging=True)
+    if db.session.execute(statement).rowcount:
+        ChangeLog.record('sitcom', sitcom_id, 'delete')
+    db.session.commit()
+    cache.invalidate('sitcoms', f'sitcom:{sitcom_id}', f'sitcom:{sitcom_id}:characters', f'sitcom:{sitcom_id}:reviews')
+
+
+def pending_purges():
+    """
+    IDs of the sitcoms whose accepted deletion has not finished (e.g., interrupted by a restart)
+    """
+    return db.session.scalars(select(SitcomPurge.sitcom_id).order_by(SitcomPurge.requested_at)).all()
+
+
+def _hide_purging_sitcoms(orm_execute_state):
+    """
+    Leaves the sitcoms being purged, and their characters and reviews, out of every ORM query and write,
+    as if they were already deleted
+    Statements run with the 'include_purging' execution option (the purge itself) still see them
+    """
+    if orm_execute_state.execution_options.get('include_purging') or not has_app_context():
+        return
+    if orm_execute_state.is_column_load or orm_execute_state.is_relationship_load:
+        return
+    if 'sitcom_purger' not in current_app.extensions:
+        return
+    hidden = purger.hidden_ids()
+    if hidden:
+        orm_execute_state.statement = orm_execute_state.statement.options(
+            with_loader_criteria(Sitcom, Sitcom.id.not_in(hidden), include_aliases=True),
+            with_loader_criteria(Character, Character.sitcom_id.not_in(hidden), include_aliases=True),
+            with_loader_criteria(Review, Review.sitcom_id.not_in(hidden), include_aliases=True)
+        )
+
+
+class _PurgerState:
+    """
+    Per-application purge queue; the worker thread is started on first use
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.chunk_size = app.config['PURGE_CHUNK_SIZE']
+        self.pending_ttl = app.config['PURGE_PENDING_TTL']
+        self.queue = queue.Queue()
+        self.hidden = frozenset() # IDs of the sitcoms being purged, reloaded every PURGE_PENDING_TTL seconds
+        self.hidden_loaded = None
+        self.table_ready = False # sitcom_purges exists ('flask init-db' may not have run yet)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='sitcom-purge', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            sitcom_id = self.queue.get()
+            with self.app.app_context():
+                try:
+                    purge_sitcom(sitcom_id, self.chunk_size)
+                    logger.info("Purged sitcom %s", sitcom_id)
+                except Exception:
+                    db.session.rollback()
+                    # The purge record stays, so 'flask purge-sitcoms' can finish the job
+                    logger.exception("Error purging sitcom %s", sitcom_id)
+                finally:
+                    db.session.remove()
+                    self.queue.task_done()
+
+
+class SitcomPurger:
+    """
+    Deletes large sitcoms in a background thread so the DELETE request returns straight away
+    Sitcoms with more than PURGE_ASYNC_THRESHOLD characters + reviews are purged in chunks; 0 always deletes inline
+    """
+
+    def init_app(self, app):
+        app.extensions['sitcom_purger'] = _PurgerState(app)
+        if not event.contains(db.session, 'do_orm_execute', _hide_purging_sitcoms):
+            event.listen(db.session, 'do_orm_execute', _hide_purging_sitcoms)
+
+    @property
+    def _state(self):
+        return current_app.extensions['sitcom_purger']
+
+    def _table_ready(self):
+        """
+        True once the sitcom_purges table exists; until then there is nothing to hide or resume
+        Checked with the inspector rather than by querying it, so a missing table never fails the caller's transaction
+        """
+        state = self._state
+        if not state.table_ready:
+            state.table_ready = inspect(db.session.connection()).has_table(SitcomPurge.__tablename__)
+        return state.table_ready
+
+    def should_defer(self, sitcom):
+        """
+        True when the sitcom has too many children to delete within the request
+        """
+        threshold = current_app.config['PURGE_ASYNC_THRESHOLD']
+        return bool(threshold) and count_children(sitcom) > threshold
+
+    def submit(self, sitcom_id):
+        """
+        Queues a sitcom whose SitcomPurge record is committed for deletion by the worker thread
+        """
+        state = self._state
+        state.start()
+        state.queue.put(sitcom_id)
+
+    def hide(self, sitcom_id):
+        """
+        Hides a sitcom from this process straight away; other processes pick it up within PURGE_PENDING_TTL
+        """
+        state = self._state
+        state.hidden = state.hidden | {sitcom_id}
+
+    def hidden_ids(self):
+        """
+        IDs of the sitcoms whose purge is pending, read from the database at most every PURGE_PENDING_TTL seconds
+        """
+        state = self._state
+        now = time.monotonic()
+        if state.hidden_loaded is None or now - state.hidden_loaded >= state.pending_ttl:
+            state.hidden_loaded = now
+            if not self._table_ready():
+                return state.hidden
+            statement = select(SitcomPurge.sitcom_id).execution_options(include_purging=True)
+            state.hidden = frozenset(db.session.scalars(statement))
+        return state.hidden
+
+    def resume(self):
+        """
+        Queues the purges left unfinished by a process that stopped (e.g., a worker recycled after max_requests)
+        Each one is claimed by re-stamping its requested_at, so workers starting together do not all take it
+        Returns the number of purges this process took over
+        """
+        if not self._table_ready():
+            return 0
+        resumed = 0
+        for purge in db.session.execute(select(SitcomPurge.sitcom_id, SitcomPurge.requested_at)).all():
+            claim = update(SitcomPurge).where(
+                SitcomPurge.sitcom_id == purge.sitcom_id, SitcomPurge.requested_at == purge.requested_at
+            ).values(requested_at=datetime.now(timezone.utc))
+            claimed = db.session.execute(claim).rowcount
+            db.session.commit()
+            if claimed:
+                self.submit(purge.sitcom_id)
+                resumed += 1
+        return resumed
+
+    def join(self):
+        """
+        Blocks until every queued purge has finished (for scripts and tests)
+        """
+        self._state.queue.join()
+
+
+# The shared purger; configured per application with init_app()
+purger = SitcomPurger()
@@ -0,0 +1,137 @@
+# app/utils/query_plans.py
+import re
+from sqlalchemy import func, select
+from app import db
+from app.models.change_log import ChangeLog
+from app.models.character import Character
+from app.models.review import Review
+from app.models.sitcom import Sitcom
+from app.models.user import User
+from app.utils.seed import SEED_WORDS
+from app.utils.sql_instrumentation import record_queries
+
+
+# Hot read paths checked by 'flask check-query-plans': (name, method, path, JSON body, tables allowed to be scanned)
+# Paths are formatted with the sample IDs picked from the database (see hot_path_samples)
+# The allowed scans are deliberate: the catalog statistics aggregate one row per sitcom,
+# and per-sitcom statistics refresh that catalog mean once per STATS_PRIOR_TTL
+HOT_PATHS = [
+    ('POST /api/auth/login', 'POST', '/api/auth/login', {'username': '{username}', 'password': '-'}, ()),
+    ('GET /api/sitcoms', 'GET', '/api/sitcoms?limit=20', None, ()),
+    ('GET /api/sitcoms (filtered, sorted)', 'GET', '/api/sitcoms?genre={genre}&sort=-average_rating&limit=20', None, ()),
+    ('GET /api/sitcoms?ids=', 'GET', '/api/sitcoms?ids={sitcom_id},{other_sitcom_id}', None, ()),
+    ('GET /api/sitcoms/<id>', 'GET', '/api/sitcoms/{sitcom_id}', None, ()),
+    ('GET /api/sitcoms/<id>?include=', 'GET', '/api/sitcoms/{sitcom_id}?include=characters,reviews', None, ()),
+    ('GET /api/sitcoms/<id>/characters', 'GET', '/api/sitcoms/{character_sitcom_id}/characters?limit=20', None, ()),
+    ('GET /api/sitcoms/<id>/characters/<id>', 'GET', '/api/sitcoms/{character_sitcom_id}/characters/{character_id}', None, ()),
+    ('GET /api/characters?ids=', 'GET', '/api/characters?ids={character_id}', None, ()),
+    ('GET /api/sitcoms/<id>/reviews', 'GET', '/api/sitcoms/{sitcom_id}/reviews?limit=20', None, ()),
+    ('GET /api/sitcoms/<id>/reviews/<id>', 'GET', '/api/sitcoms/{sitcom_id}/reviews/{review_id}', None, ()),
+    ('GET /api/sitcoms/<id>/stats', 'GET', '/api/sitcoms/{sitcom_id}/stats', None, ('sitcom_stats',)),
+    ('GET /api/stats', 'GET', '/api/stats', None, ('sitcom_stats', 'sitcom_monthly_ratings')),
+    ('GET /api/search', 'GET', '/api/search?q={word}&limit=10', None, ()),
+    ('GET /api/changes', 'GET', '/api/changes?since={change_cursor}&limit=50', None, ()),
+]
+
+
+# Tables that only ever hold a handful of rows, so scanning them costs nothing: the sitcoms being purged
+# (read by every worker every PURGE_PENDING_TTL seconds to hide them)
+SMALL_TABLES = ('sitcom_purges',)
+
+
+class PlanCheckError(Exception):
+    """
+    Raised when the database has no data to build the sample requests from, or no EXPLAIN support
+    """
+
+
+def hot_path_samples():
+    """
+    IDs and values the hot path requests are built from: a reviewed sitcom, one of its reviews, a character, ...
+    """
+    review = db.session.execute(select(Review.sitcom_id, Review.id).order_by(Review.id).limit(1)).first()
+    character = db.session.execute(select(Character.sitcom_id, Character.id).order_by(Character.id).limit(1)).first()
+    username = db.session.scalar(select(User.username).order_by(User.id).limit(1))
+    if not (review and character and username):
+        raise PlanCheckError("The database needs users, characters and reviews; seed it first (flask seed)")
+    sitcom = db.session.get(Sitcom, review.sitcom_id)
+    other_sitcom_id = db.session.scalar(select(Sitcom.id).where(Sitcom.id != sitcom.id).order_by(Sitcom.id).limit(1))
+    last_change = db.session.scalar(select(func.max(ChangeLog.id)))
+    return {
+        'username': username, 'genre': sitcom.genre, 'word': SEED_WORDS[0],
+        'sitcom_id': sitcom.id, 'other_sitcom_id': other_sitcom_id or sitcom.id, 'review_id': review.id,
+        'character_sitcom_id': character.sitcom_id, 'character_id': character.id,
+        'change_cursor': max((last_change or 0) - 50, 0)
+    }
+
+
+def _scans(connection, statement, parameters):
+    """
+    Runs EXPLAIN on a statement and returns (table, plan detail) for every full table or index scan in it
+    A scan is only left out when a LIMIT stops it early: no sort step, and no WHERE condition that the walk
+    has to filter rows by (those read the whole table when few rows match); scans of derived tables
+    (subqueries) and full-text virtual tables are not table scans either
+    """
+    limited = re.search(r'\bLIMIT\b', statement, re.IGNORECASE) is not None
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        plan = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+        details = [row[3] for row in plan]
+        # SQLite reports the index terms a WHERE is answered with as a SEARCH, never as a SCAN; a SCAN
+        # of a statement with a WHERE clause therefore filters the rows it walks
+        filtered = re.search(r'\bWHERE\b', statement, re.IGNORECASE) is not None
+        if limited and not filtered and not any('TEMP B-TREE' in detail for detail in details):
+            return []
+        return [(detail.split()[1], detail) for detail in details
+                if detail.startswith('SCAN ') and detail.split()[1] in db.metadata.tables]
+    if dialect == 'mysql':
+        plan = connection.exec_driver_sql(f'EXPLAIN {statement}', parameters).mappings().all()
+        bounded = limited and not any('filesort' in (row['Extra'] or '') for row in plan)
+        scans = []
+        for row in plan:
+            extra = row['Extra'] or ''
+            if row['type'] not in ('ALL', 'index') or row['table'] not in db.metadata.tables:
+                continue
+            # 'Using where' means the walk filters rows the index does not cover
+            if bounded and 'Using where' not in extra:
+                continue
+            scans.append((row['table'], f"type={row['type']} key={row['key']} rows={row['rows']} {extra}".strip()))
+        return scans
+    raise PlanCheckError(f"Query plan checks are not supported on {dialect}")
+
+
+def hot_path_scans(client, hot_path, samples):
+    """
+    Sends one HOT_PATHS request through the test client and EXPLAINs every SELECT it ran
+    Returns (table, plan detail) for each full scan outside the path's allowed tables and SMALL_TABLES
+    """
+    name, method, path, body, allowed_tables = hot_path
+    if body:
+        body = {key: value.format(**samples) for key, value in body.items()}
+    with record_queries(db.engine, with_parameters=True) as statements:
+        response = client.open(path.format(**samples), method=method, json=body)
+    if response.status_code >= 500:
+        return [(None, f"request failed with status {response.status_code}")]
+
+    scans = []
+    with db.engine.connect() as connection:
+        seen = set()
+        for statement, parameters in statements:
+            if statement in seen or not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+                continue
+            seen.add(statement)
+            for table, detail in _scans(connection, statement, parameters):
+                if table not in allowed_tables and table not in SMALL_TABLES:
+                    scans.append((table, detail))
+    return scans
+
+
+def check_query_plans(app):
+    """
+    Runs hot_path_scans for every HOT_PATHS entry ('flask check-query-plans'; tests/test_query_plans.py runs the same)
+    Returns a list of (path name, table, plan detail) violations; an empty list means every hot path uses indexes
+    """
+    samples = hot_path_samples()
+    client = app.test_client()
+    return [(hot_path[0], table, detail)
+            for hot_path in HOT_PATHS for table, detail in hot_path_scans(client, hot_path, samples)]
@@ -0,0 +1,124 @@
+# app/utils/search.py
+import re
+from sqlalchemy import DDL, event, text
+from app import db
+from app.models.sitcom import Sitcom
+from app.models.character import Character
+
+
+class SearchNotSupported(Exception):
+    """
+    Raised when the database has no full-text index implementation we can use
+    """
+
+
+# Searchable text columns of each table (and the ranking weight of each column on SQLite FTS5)
+SEARCH_TABLES = {
+    'sitcoms': {'model': Sitcom, 'columns': ('title', 'synopsis', 'creator'), 'weights': (10.0, 1.0, 5.0)},
+    'characters': {'model': Character, 'columns': ('name', 'actor', 'description'), 'weights': (10.0, 5.0, 1.0)}
+}
+
+MAX_QUERY_TERMS = 16
+
+
+def _mysql_ddl(table, columns):
+    """
+    FULLTEXT index used by MATCH ... AGAINST on MySQL
+    """
+    return [f"ALTER TABLE {table} ADD FULLTEXT INDEX ft_{table}_search ({', '.join(columns)})"]
+
+
+def _sqlite_ddl(table, columns):
+    """
+    External-content FTS5 table kept in sync with its base table by triggers, so every
+    write (ORM, bulk insert or raw SQL) updates the index in the same transaction
+    """
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    fts = f'{table}_fts'
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({column_list}, content='{table}', content_rowid='id')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); END",
+        # Only re-index when a searchable column changes (not on rating or version bumps)
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column_list} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+    ]
+
+
+# Create the indexes together with the tables (db.create_all)
+for _table, _spec in SEARCH_TABLES.items():
+    _sa_table = _spec['model'].__table__
+    for _statement in _mysql_ddl(_table, _spec['columns']):
+        event.listen(_sa_table, 'after_create', DDL(_statement).execute_if(dialect='mysql'))
+    for _statement in _sqlite_ddl(_table, _spec['columns']):
+        event.listen(_sa_table, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+    event.listen(_sa_table, 'before_drop', DDL(f'DROP TABLE IF EXISTS {_table}_fts').execute_if(dialect='sqlite'))
+
+
+def create_search_indexes():
+    """
+    Creates the full-text indexes on an existing database and (re)builds them from the base tables
+    """
+    dialect = db.engine.dialect.name
+    for table, spec in SEARCH_TABLES.items():
+        if dialect == 'mysql':
+            exists = db.session.execute(text(
+                "SELECT COUNT(*) FROM information_schema.statistics "
+                "WHERE table_schema = DATABASE() AND table_name = :table AND index_name = :index"
+            ), {'table': table, 'index': f'ft_{table}_search'}).scalar()
+            if not exists:
+                for statement in _mysql_ddl(table, spec['columns']):
+                    db.session.execute(text(statement))
+        elif dialect == 'sqlite':
+            for statement in _sqlite_ddl(table, spec['columns']):
+                db.session.execute(text(statement))
+            db.session.execute(text(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')"))
+        else:
+            raise SearchNotSupported(f"Full-text search is not supported on {dialect}")
+    db.session.commit()
+
+
+def _ranked_ids(table, query, limit):
+    """
+    Returns [(id, score)] of the best matches in one table, best first, using the native full-text index
+    """
+    dialect = db.session.get_bind().dialect.name
+    columns = ', '.join(SEARCH_TABLES[table]['columns'])
+    if dialect == 'mysql':
+        statement = text(
+            f"SELECT id, MATCH({columns}) AGAINST (:query IN NATURAL LANGUAGE MODE) AS score FROM {table} "
+            f"WHERE MATCH({columns}) AGAINST (:query IN NATURAL LANGUAGE MODE) "
+            "ORDER BY score DESC, id LIMIT :limit"
+        )
+        params = {'query': query, 'limit': limit}
+    elif dialect == 'sqlite':
+        # Quote every term so user input can never be parsed as FTS5 query syntax
+        terms = re.findall(r'\w+', query)[:MAX_QUERY_TERMS]
+        if not terms:
+            return []
+        weights = ', '.join(str(weight) for weight in SEARCH_TABLES[table]['weights'])
+        statement = text(
+            f"SELECT rowid AS id, -bm25({table}_fts, {weights}) AS score FROM {table}_fts "
+            f"WHERE {table}_fts MATCH :query ORDER BY score DESC, rowid LIMIT :limit"
+        )
+        params = {'query': ' OR '.join(f'"{term}"' for term in terms), 'limit': limit}
+    else:
+        raise SearchNotSupported(f"Full-text search is not supported on {dialect}")
+    return [(row.id, float(row.score)) for row in db.session.execute(statement, params)]
+
+
+def search(table, query, limit):
+    """
+    Returns up to 'limit' objects of one searchable table ranked by relevance, each paired with its score
+    """
+    ranked = _ranked_ids(table, query, limit)
+    if not ranked:
+        return []
+    model = SEARCH_TABLES[table]['model']
+    objects = {obj.id: obj for obj in model.query.filter(model.id.in_([row_id for row_id, _ in ranked]))}
+    return [(objects[row_id], score) for row_id, score in ranked if row_id in objects]
@@ -0,0 +1,132 @@
+# app/utils/seed.py
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select
+from app import db
+from app.models.change_log import ChangeLog
+from app.models.character import Character
+from app.models.review import Review
+from app.models.sitcom import Sitcom
+from app.models.sitcom_stats import SitcomStats
+from app.models.user import User
+from app.utils.hashing import password_hasher
+
+
+SEED_WORDS = ['office', 'family', 'friends', 'bar', 'hospital', 'school', 'neighbours', 'diner', 'police', 'station',
+              'apartment', 'wedding', 'road', 'trip', 'boss', 'roommate', 'secret', 'holiday', 'party', 'band',
+              'brothers', 'sisters', 'coffee', 'island', 'campus', 'hotel', 'newsroom', 'garage', 'farm', 'ship']
+SEED_GENRES = ['Sitcom', 'Mockumentary Sitcom', 'Workplace Comedy', 'Family Sitcom', 'Romantic Comedy', 'Animated Sitcom']
+SEED_ROLES = ['Lead', 'Supporting', 'Recurring', 'Background', 'Cameo']
+SEED_EPOCH = datetime(2020, 1, 1)
+
+
+def _next_id(model):
+    """
+    First free primary key of a table, so seeded rows can carry explicit ids and reference each other
+    without reading them back
+    """
+    return (db.session.scalar(select(func.max(model.id))) or 0) + 1
+
+
+def _words(rng, count):
+    return ' '.join(rng.choice(SEED_WORDS) for _ in range(count))
+
+
+def _insert(model, rows):
+    """
+    Multi-row INSERT through Core, skipping the ORM unit of work
+    """
+    if rows:
+        db.session.connection().execute(insert(model.__table__), rows)
+
+
+def seed_catalog(users, sitcoms, characters_per_sitcom, reviews_per_sitcom, seed=42, batch_size=1000,
+                 password='password', progress=None):
+    """
+    Appends deterministic synthetic users, sitcoms, characters and reviews to the database
+    Rows are written with multi-row INSERTs, committing once per 'batch_size' sitcoms (with their children)
+    Each sitcom gets 0..2x the requested characters/reviews per sitcom; its reviewers are distinct
+    consecutive seeded users, so _user_sitcom_review_uc holds without retries, and the rating aggregates
+    are computed while generating; the review histograms are rebuilt in one pass at the end
+    Returns the number of rows inserted per table
+    """
+    if users < 1:
+        raise ValueError("At least one user is required to own and review sitcoms")
+
+    rng = random.Random(seed)
+    password_hash = password_hasher.hash(password) # One hash shared by every seeded user
+    counts = {'users': 0, 'sitcoms': 0, 'characters': 0, 'reviews': 0}
+
+    first_user_id = _next_id(User)
+    for start in range(0, users, batch_size * 10):
+        rows = []
+        for user_id in range(first_user_id + start, first_user_id + min(start + batch_size * 10, users)):
+            created_at = SEED_EPOCH + timedelta(minutes=user_id)
+            rows.append({
+                'id': user_id, 'username': f'seed_user_{user_id}', 'email': f'seed_user_{user_id}@example.com',
+                'password_hash': password_hash, 'created_at': created_at, 'updated_at': created_at
+            })
+        _insert(User, rows)
+        db.session.commit()
+        counts['users'] += len(rows)
+        if progress:
+            progress(counts)
+
+    next_sitcom_id, next_character_id, next_review_id = _next_id(Sitcom), _next_id(Character), _next_id(Review)
+    for start in range(0, sitcoms, batch_size):
+        sitcom_rows, character_rows, review_rows = [], [], []
+        for sitcom_id in range(next_sitcom_id + start, next_sitcom_id + min(start + batch_size, sitcoms)):
+            created_at = SEED_EPOCH + timedelta(minutes=sitcom_id)
+            first_year = rng.randint(1970, 2020)
+            seasons = rng.randint(1, 12)
+
+            for _ in range(rng.randint(0, 2 * characters_per_sitcom)):
+                character_rows.append({
+                    'id': next_character_id, 'sitcom_id': sitcom_id, 'name': _words(rng, 2).title(),
+                    'actor': _words(rng, 2).title(), 'role': rng.choice(SEED_ROLES), 'description': _words(rng, 8),
+                    'created_at': created_at, 'updated_at': created_at
+                })
+                next_character_id += 1
+
+            # Reviewers are distinct consecutive users, wrapping around the seeded range
+            review_count = min(rng.randint(0, 2 * reviews_per_sitcom), users)
+            first_reviewer = rng.randrange(users)
+            score_sum = 0
+            for offset in range(review_count):
+                score = rng.choices((1, 2, 3, 4, 5), weights=(1, 2, 4, 6, 4))[0]
+                score_sum += score
+                review_rows.append({
+                    'id': next_review_id, 'sitcom_id': sitcom_id,
+                    'user_id': first_user_id + (first_reviewer + offset) % users,
+                    'score': score, 'text': _words(rng, 10), 'created_at': created_at, 'updated_at': created_at
+                })
+                next_review_id += 1
+
+            sitcom_rows.append({
+                'id': sitcom_id, 'title': f'{_words(rng, 2).title()} #{sitcom_id}', 'creator': _words(rng, 2).title(),
+                'genre': rng.choice(SEED_GENRES), 'years_active': f'{first_year}-{first_year + seasons}',
+                'number_of_seasons': seasons, 'synopsis': _words(rng, 16),
+                'user_id': first_user_id + rng.randrange(users),
+                'rating_count': review_count, 'rating_sum': score_sum,
+                'rating_avg': score_sum / review_count if review_count else 0,
+                'created_at': created_at, 'updated_at': created_at
+            })
+
+        # Parents first so the foreign keys are satisfied
+        _insert(Sitcom, sitcom_rows)
+        _insert(Character, character_rows)
+        _insert(Review, review_rows)
+        # Log the creates like the API does, so change feed consumers replaying from the start see seeded rows
+        for entity, rows in (('sitcom', sitcom_rows), ('character', character_rows), ('review', review_rows)):
+            if rows:
+                ChangeLog.record_inserted(entity, rows[0]['id'] - 1, ChangeLog.ENTITIES[entity].id <= rows[-1]['id'])
+        db.session.commit()
+        counts['sitcoms'] += len(sitcom_rows)
+        counts['characters'] += len(character_rows)
+        counts['reviews'] += len(review_rows)
+        if progress:
+            progress(counts)
+
+    SitcomStats.recompute()
+    db.session.commit()
+    return counts
@@ -0,0 +1,163 @@
+# app/utils/sql_instrumentation.py
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, got_request_exception, has_app_context, request
+from sqlalchemy import event
+
+
+logger = logging.getLogger('sitcomverse.sql')
+
+# Collapses expanded IN lists, e.g. "IN (?, ?, ?)" or "IN (%s, %s)", so they count as one statement shape
+_IN_LIST = re.compile(r'\(\s*(?:\?|%s|:\w+)(?:\s*,\s*(?:\?|%s|:\w+))+\s*\)')
+
+
+class NPlusOneError(RuntimeError):
+    """
+    Raised in strict mode when one request repeats the same statement shape too often
+    """
+
+
+def statement_shape(statement):
+    """
+    Normalizes a SQL statement so repeated executions with different IN-list sizes look the same
+    """
+    return _IN_LIST.sub('(?)', ' '.join(statement.split()))
+
+
+class _RequestStats:
+    """
+    SQL counters of the request being served
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement = None
+        self.shapes = Counter()
+        self.flagged = set()
+        self.error = None # NPlusOneError raised in strict mode, re-raised after the view if it swallowed it
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start time so the next one is timed right
+    started = context.connection.info.get('query_started') if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def _make_after_cursor_execute(app):
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info['query_started'].pop()) * 1000
+        if not has_app_context() or 'sql_stats' not in g:
+            return
+
+        stats = g.sql_stats
+        stats.count += 1
+        stats.total_ms += elapsed_ms
+        if elapsed_ms >= stats.slowest_ms:
+            stats.slowest_ms, stats.slowest_statement = elapsed_ms, statement
+
+        threshold = app.config['SQL_N_PLUS_ONE_THRESHOLD']
+        if threshold:
+            shape = statement_shape(statement)
+            stats.shapes[shape] += 1
+            if stats.shapes[shape] > threshold and shape not in stats.flagged:
+                stats.flagged.add(shape)
+                message = f"Possible N+1: statement ran {stats.shapes[shape]} times in {request.method} {request.path}: {shape[:200]}"
+                if app.config['SQL_N_PLUS_ONE_RAISE']:
+                    stats.error = NPlusOneError(message)
+                    raise stats.error
+                logger.warning(message)
+
+    return after_cursor_execute
+
+
+def init_sql_instrumentation(app, engine):
+    """
+    Records per-request query count, total SQL time and the slowest statement
+    Reports them in a Server-Timing header and a structured log line (logger 'sitcomverse.sql')
+    With SQL_N_PLUS_ONE_THRESHOLD > 0, warns (or raises NPlusOneError when SQL_N_PLUS_ONE_RAISE is set)
+    once a statement shape repeats more often than the threshold within one request; the error fails the
+    request even when the view catches it
+    """
+    if not app.config['SQL_INSTRUMENTATION']:
+        return
+
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _make_after_cursor_execute(app))
+    event.listen(engine, 'handle_error', _handle_error)
+
+    def error_reported(sender, exception, **extra):
+        # The NPlusOneError reached Flask's error handling on its own, so report_sql_stats need not raise it again
+        stats = g.get('sql_stats')
+        if stats is not None and exception is stats.error:
+            stats.error = None
+    got_request_exception.connect(error_reported, app, weak=False)
+
+    @app.before_request
+    def start_sql_stats():
+        g.sql_stats = _RequestStats()
+
+    @app.after_request
+    def report_sql_stats(response):
+        stats = g.pop('sql_stats', None)
+        if stats is None:
+            return response
+        total_ms = (time.perf_counter() - stats.started) * 1000
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={stats.total_ms:.2f};desc="{stats.count} queries", app;dur={total_ms:.2f}'
+        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                'event': 'request_sql',
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'queries': stats.count,
+                'sql_ms': round(stats.total_ms, 3),
+                'request_ms': round(total_ms, 3),
+                'slowest_ms': round(stats.slowest_ms, 3),
+                'slowest_statement': stats.slowest_statement[:500] if stats.slowest_statement else None
+            }))
+        if stats.error is not None:
+            # The view caught the error (e.g. in a broad 'except Exception') and answered anyway: strict mode
+            # must still fail the request, so it reaches Flask's error handling (and the test client) from here
+            raise stats.error
+        return response
+
+
+@contextmanager
+def record_queries(engine, with_parameters=False):
+    """
+    Collects every statement executed on 'engine' inside the block, from any thread
+    Lets tests assert query budgets, e.g.:
+
+        with record_queries(db.engine) as statements:
+            client.get('/api/sitcoms')
+        assert len(statements) <= 2
+
+    With with_parameters=True each entry is a (statement, parameters) pair, ready to be replayed (e.g. by EXPLAIN)
+    """
+    statements, lock = [], threading.Lock()
+
+    def collect(conn, cursor, statement, parameters, context, executemany):
+        with lock:
+            statements.append((statement, parameters) if with_parameters else statement)
+
+    event.listen(engine, 'before_cursor_execute', collect)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', collect)
@@ -0,0 +1,393 @@
+# benchmarks/api_benchmark.py
+"""
+Seeds a scratch database and benchmarks every API endpoint through the WSGI app
+
+The data comes from the 'flask seed' generator (app/utils/seed.py). Each endpoint is driven in-process
+twice: sequentially (one request at a time) and concurrently (--concurrency threads). Throughput and
+p50/p95/p99 latency per endpoint are printed as JSON.
+
+Usage:
+    python benchmarks/api_benchmark.py --sitcoms 1000 --characters-per-sitcom 10 --reviews-per-sitcom 20
+    python benchmarks/api_benchmark.py --save-baseline benchmarks/baseline.json
+    python benchmarks/api_benchmark.py --baseline benchmarks/baseline.json --tolerance 0.25
+
+With --baseline the run is compared against a saved result and the script exits with status 1 when
+an endpoint's p95 latency grew, or its throughput dropped, by more than the tolerance.
+--database-url points the run at another (e.g. MySQL) database; it must be an empty scratch database.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BENCH_PASSWORD = 'benchmark password'
+BULK_REQUEST_ITEMS = 20
+
+
+def percentile(sorted_values, pct):
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)]
+
+
+class BenchContext:
+    """
+    Ids of the seeded data plus the benchmark user, shared by the endpoint scenarios
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.sitcom_ids = []
+        self.character_keys = [] # (sitcom_id, character_id)
+        self.review_keys = [] # (sitcom_id, review_id)
+        self.bench_user_id = None
+        self.token = None
+        self._run = 0
+
+    def run_tag(self):
+        """
+        A fresh prefix for the rows one scenario run creates, so runs never collide on unique columns
+        """
+        self._run += 1
+        return f'bench-{os.getpid()}-{self._run}'
+
+    def pick(self, items, i):
+        return items[(i * 7919) % len(items)] # Spread requests over the data without a shared RNG
+
+
+def seed_database(ctx, users, sitcoms, characters_per_sitcom, reviews_per_sitcom, seed):
+    """
+    Fills the empty database through the 'flask seed' generator, then adds the benchmark user
+    """
+    from app import db
+    from app.models.character import Character
+    from app.models.review import Review
+    from app.models.sitcom import Sitcom
+    from app.models.user import User
+    from app.utils.seed import seed_catalog
+
+    seed_catalog(users, sitcoms, characters_per_sitcom, reviews_per_sitcom, seed=seed, password=BENCH_PASSWORD)
+    bench_user = User(username='bench', email='bench@example.com')
+    bench_user.set_password(BENCH_PASSWORD)
+    db.session.add(bench_user)
+    db.session.commit()
+    ctx.bench_user_id = bench_user.id
+
+    ctx.sitcom_ids = db.session.scalars(db.select(Sitcom.id).order_by(Sitcom.id)).all()
+    ctx.character_keys = db.session.execute(db.select(Character.sitcom_id, Character.id).order_by(Character.id)).all()
+    ctx.review_keys = db.session.execute(db.select(Review.sitcom_id, Review.id).order_by(Review.id)).all()
+
+
+def _prepare_sitcoms(ctx, count, owner_id=None):
+    """
+    Inserts 'count' throwaway sitcoms (owned by the benchmark user by default) and returns their ids
+    """
+    from app import db
+    from app.models.sitcom import Sitcom
+    from app.utils.bulk import insert_rows
+
+    tag = ctx.run_tag()
+    insert_rows(Sitcom, [{
+        'title': f'{tag}-{k}', 'creator': 'Benchmark', 'genre': 'Sitcom',
+        'user_id': owner_id or ctx.bench_user_id
+    } for k in range(count)])
+    db.session.commit()
+    return db.session.scalars(db.select(Sitcom.id).where(Sitcom.title.like(f'{tag}-%')).order_by(Sitcom.id)).all()
+
+
+def _prepare_characters(ctx, count):
+    """
+    Inserts 'count' characters in a sitcom owned by the benchmark user; returns (sitcom_id, character_id) pairs
+    """
+    from app import db
+    from app.models.character import Character
+    from app.utils.bulk import insert_rows
+
+    sitcom_id = _prepare_sitcoms(ctx, 1)[0]
+    insert_rows(Character, [{'sitcom_id': sitcom_id, 'name': f'Character {k}'} for k in range(count)])
+    db.session.commit()
+    return db.session.execute(
+        db.select(Character.sitcom_id, Character.id).where(Character.sitcom_id == sitcom_id).order_by(Character.id)
+    ).all()
+
+
+def _prepare_reviews(ctx, count):
+    """
+    Inserts one review by the benchmark user on each of 'count' fresh sitcoms; returns (sitcom_id, review_id) pairs
+    """
+    from app import db
+    from app.models.review import Review
+    from app.models.sitcom import Sitcom
+    from app.models.sitcom_stats import SitcomStats
+    from app.utils.bulk import insert_rows
+
+    sitcom_ids = _prepare_sitcoms(ctx, count)
+    insert_rows(Review, [{'sitcom_id': sitcom_id, 'user_id': ctx.bench_user_id, 'score': 3} for sitcom_id in sitcom_ids])
+    SitcomStats.record_reviews((sitcom_id, 3, datetime.now(timezone.utc), 1) for sitcom_id in sitcom_ids)
+    db.session.execute(
+        db.update(Sitcom).where(Sitcom.id.in_(sitcom_ids)).values(rating_count=1, rating_sum=3, rating_avg=3),
+        execution_options={'synchronize_session': False}
+    )
+    db.session.commit()
+    return db.session.execute(
+        db.select(Review.sitcom_id, Review.id).where(Review.user_id == ctx.bench_user_id, Review.sitcom_id.in_(sitcom_ids))
+        .order_by(Review.sitcom_id)
+    ).all()
+
+
+def build_scenarios():
+    """
+    One entry per endpoint: (name, needs JWT, prepare(ctx, n) -> targets, request(ctx, targets, i) -> (method, path, json))
+    Write scenarios prepare their own rows, so every request in a run hits a distinct, valid target
+    """
+    from app.utils.seed import SEED_GENRES, SEED_WORDS
+
+    def sitcom_body(title):
+        return {'title': title, 'creator': 'Benchmark', 'genre': 'Sitcom', 'number_of_seasons': 3, 'synopsis': 'bench'}
+
+    return [
+        ('POST /api/auth/register', False, lambda ctx, n: ctx.run_tag(),
+         lambda ctx, tag, i: ('POST', '/api/auth/register',
+                              {'username': f'{tag}-{i}', 'email': f'{tag}-{i}@example.com', 'password': BENCH_PASSWORD})),
+        ('POST /api/auth/login', False, None,
+         lambda ctx, _, i: ('POST', '/api/auth/login', {'username': 'bench', 'password': BENCH_PASSWORD})),
+        ('GET /api/auth/protected', True, None,
+         lambda ctx, _, i: ('GET', '/api/auth/protected', None)),
+
+        ('POST /api/sitcoms', True, lambda ctx, n: ctx.run_tag(),
+         lambda ctx, tag, i: ('POST', '/api/sitcoms', sitcom_body(f'{tag}-{i}'))),
+        ('POST /api/sitcoms/bulk', True, lambda ctx, n: ctx.run_tag(),
+         lambda ctx, tag, i: ('POST', '/api/sitcoms/bulk',
+                              [sitcom_body(f'{tag}-{i}-{k}') for k in range(BULK_REQUEST_ITEMS)])),
+        ('GET /api/sitcoms', False, None,
+         lambda ctx, _, i: ('GET', '/api/sitcoms?limit=20', None)),
+        ('GET /api/sitcoms (filtered, sorted)', False, None,
+         lambda ctx, _, i: ('GET', f'/api/sitcoms?genre={ctx.pick(SEED_GENRES, i)}&sort=-average_rating&limit=20', None)),
+        ('GET /api/sitcoms/<id>', False, None,
+         lambda ctx, _, i: ('GET', f'/api/sitcoms/{ctx.pick(ctx.sitcom_ids, i)}', None)),
+        ('PUT /api/sitcoms/<id>', True, _prepare_sitcoms,
+         lambda ctx, ids, i: ('PUT', f'/api/sitcoms/{ids[i]}', {'synopsis': f'updated {i}'})),
+        ('DELETE /api/sitcoms/<id>', True, _prepare_sitcoms,
+         lambda ctx, ids, i: ('DELETE', f'/api/sitcoms/{ids[i]}', None)),
+
+        ('POST /api/sitcoms/<id>/characters', True, lambda ctx, n: _prepare_sitcoms(ctx, 1)[0],
+         lambda ctx, sitcom_id, i: ('POST', f'/api/sitcoms/{sitcom_id}/characters', {'name': f'Character {i}'})),
+        ('POST /api/characters/bulk', True, lambda ctx, n: _prepare_sitcoms(ctx, 1)[0],
+         lambda ctx, sitcom_id, i: ('POST', '/api/characters/bulk',
+                                    [{'sitcom_id': sitcom_id, 'name': f'Character {i}-{k}'} for k in range(BULK_REQUEST_ITEMS)])),
+        ('GET /api/sitcoms/<id>/characters', False, None,
+         lambda ctx, _, i: ('GET', f'/api/sitcoms/{ctx.pick(ctx.sitcom_ids, i)}/characters?limit=20', None)),
+        ('GET /api/sitcoms/<id>/characters/<id>', False, None,
+         lambda ctx, _, i: ('GET', '/api/sitcoms/{}/characters/{}'.format(*ctx.pick(ctx.character_keys, i)), None)),
+        ('PUT /api/sitcoms/<id>/characters/<id>', True, _prepare_characters,
+         lambda ctx, keys, i: ('PUT', '/api/sitcoms/{}/characters/{}'.format(*keys[i]), {'role': 'Lead'})),
+        ('DELETE /api/sitcoms/<id>/characters/<id>', True, _prepare_characters,
+         lambda ctx, keys, i: ('DELETE', '/api/sitcoms/{}/characters/{}'.format(*keys[i]), None)),
+
+        ('POST /api/sitcoms/<id>/reviews', True, lambda ctx, n: _prepare_sitcoms(ctx, n),
+         lambda ctx, ids, i: ('POST', f'/api/sitcoms/{ids[i]}/reviews', {'score': 4, 'text': 'bench'})),
+        ('POST /api/reviews/bulk', True, lambda ctx, n: _prepare_sitcoms(ctx, n * BULK_REQUEST_ITEMS),
+         lambda ctx, ids, i: ('POST', '/api/reviews/bulk',
+                              [{'sitcom_id': sitcom_id, 'score': 4}
+                               for sitcom_id in ids[i * BULK_REQUEST_ITEMS:(i + 1) * BULK_REQUEST_ITEMS]])),
+        ('GET /api/sitcoms/<id>/reviews', False, None,
+         lambda ctx, _, i: ('GET', f'/api/sitcoms/{ctx.pick(ctx.sitcom_ids, i)}/reviews?limit=20', None)),
+        ('GET /api/sitcoms/<id>/reviews/<id>', False, None,
+         lambda ctx, _, i: ('GET', '/api/sitcoms/{}/reviews/{}'.format(*ctx.pick(ctx.review_keys, i)), None)),
+        ('PUT /api/sitcoms/<id>/reviews/<id>', True, _prepare_reviews,
+         lambda ctx, keys, i: ('PUT', '/api/sitcoms/{}/reviews/{}'.format(*keys[i]), {'score': 5})),
+        ('DELETE /api/sitcoms/<id>/reviews/<id>', True, _prepare_reviews,
+         lambda ctx, keys, i: ('DELETE', '/api/sitcoms/{}/reviews/{}'.format(*keys[i]), None)),
+        ('GET /api/sitcoms/<id>/stats', False, None,
+         lambda ctx, _, i: ('GET', f'/api/sitcoms/{ctx.pick(ctx.sitcom_ids, i)}/stats', None)),
+        ('GET /api/stats', False, None,
+         lambda ctx, _, i: ('GET', '/api/stats', None)),
+        ('GET /api/changes', False, None,
+         lambda ctx, _, i: ('GET', f'/api/changes?since={i * 50}&limit=50', None)),
+
+        ('GET /api/search', False, None,
+         lambda ctx, _, i: ('GET', f'/api/search?q={ctx.pick(SEED_WORDS, i)}&limit=10', None)),
+        ('GET /api/export', True, None,
+         lambda ctx, _, i: ('GET', '/api/export?format=ndjson', None)),
+        ('GET /internal/metrics', False, None,
+         lambda ctx, _, i: ('GET', '/internal/metrics', None)),
+    ]
+
+
+def run_scenario(ctx, scenario, requests, concurrency):
+    """
+    Sends 'requests' requests for one endpoint from 'concurrency' threads and summarizes their latencies
+    """
+    name, needs_auth, prepare, build_request = scenario
+    app = ctx.app
+    with app.app_context():
+        targets = prepare(ctx, requests) if prepare else None
+    headers = {'Authorization': f'Bearer {ctx.token}'} if needs_auth else {}
+    local = threading.local()
+
+    def send(i):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+        method, path, body = build_request(ctx, targets, i)
+        started = time.perf_counter()
+        response = client.open(path, method=method, json=body, headers=headers)
+        response.get_data() # Drain streamed bodies so they are part of the measurement
+        return response.status_code, time.perf_counter() - started
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(send, range(requests)))
+    else:
+        results = [send(i) for i in range(requests)]
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(duration * 1000 for _, duration in results)
+    statuses = {}
+    for status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        'requests': requests,
+        'errors': sum(1 for status, _ in results if status >= 400),
+        'statuses': statuses,
+        'throughput_rps': round(requests / elapsed, 2),
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3)
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compares p95 latency and throughput of every endpoint against a baseline run
+    Returns (comparison, regressions)
+    """
+    comparison, regressions = {}, []
+    for mode, endpoints in results.items():
+        for name, current in endpoints.items():
+            previous = baseline.get('results', {}).get(mode, {}).get(name)
+            if not previous:
+                continue
+            p95_change = current['p95_ms'] / previous['p95_ms'] - 1 if previous['p95_ms'] else 0
+            throughput_change = current['throughput_rps'] / previous['throughput_rps'] - 1 if previous['throughput_rps'] else 0
+            comparison.setdefault(mode, {})[name] = {
+                'p95_change': round(p95_change, 3),
+                'throughput_change': round(throughput_change, 3)
+            }
+            if p95_change > tolerance or throughput_change < -tolerance:
+                regressions.append(f'{mode} {name}: p95 {p95_change:+.0%}, throughput {throughput_change:+.0%}')
+    return comparison, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', help='Empty scratch database (default: a temporary SQLite file)')
+    parser.add_argument('--users', type=int, default=100, help='Seeded users (owners and reviewers)')
+    parser.add_argument('--sitcoms', type=int, default=500)
+    parser.add_argument('--characters-per-sitcom', type=int, default=10)
+    parser.add_argument('--reviews-per-sitcom', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42, help='Random seed of the generated data')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint and mode')
+    parser.add_argument('--concurrency', type=int, default=8, help='Threads of the concurrent mode')
+    parser.add_argument('--endpoints', help='Only run endpoints whose name contains this text')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the response cache (CACHE_BACKEND=null)')
+    parser.add_argument('--hash-method', help='PASSWORD_HASH_METHOD for the run (default: the configured one)')
+    parser.add_argument('--output', help='Also write the JSON report to this file')
+    parser.add_argument('--save-baseline', help='Write the JSON report to this file as the new baseline')
+    parser.add_argument('--baseline', help='Compare against this saved report')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative p95/throughput regression')
+    args = parser.parse_args()
+
+    # The configuration is read from the environment at import time, so set it before importing the app
+    scratch_dir = None
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        scratch_dir = tempfile.TemporaryDirectory(prefix='sitcomverse-bench-')
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(scratch_dir.name, 'bench.db')}"
+    if args.no_cache:
+        os.environ['CACHE_BACKEND'] = 'null'
+    # Measure the endpoints themselves: the concurrent phase would otherwise be shed or rate limited
+    os.environ.setdefault('ADMISSION_ENABLED', 'false')
+    # The metrics endpoint is off by default; the in-process test client connects from 127.0.0.1
+    os.environ['METRICS_ENABLED'] = 'true'
+    os.environ.setdefault('METRICS_ALLOWED_IPS', '127.0.0.1')
+    if args.hash_method:
+        os.environ['PASSWORD_HASH_METHOD'] = args.hash_method
+
+    from app import create_app, db
+    from app.models.sitcom import Sitcom
+
+    app = create_app()
+    ctx = BenchContext(app)
+    with app.app_context():
+        db.create_all()
+        if db.session.query(Sitcom.id).first():
+            parser.error('the benchmark database must be empty')
+        started = time.perf_counter()
+        seed_database(ctx, args.users, args.sitcoms, args.characters_per_sitcom, args.reviews_per_sitcom, args.seed)
+        seed_seconds = time.perf_counter() - started
+
+    ctx.token = app.test_client().post(
+        '/api/auth/login', json={'username': 'bench', 'password': BENCH_PASSWORD}
+    ).get_json()['access_token']
+
+    scenarios = [s for s in build_scenarios() if not args.endpoints or args.endpoints in s[0]]
+    results = {}
+    for mode, concurrency in (('sequential', 1), ('concurrent', args.concurrency)):
+        for scenario in scenarios:
+            results.setdefault(mode, {})[scenario[0]] = run_scenario(ctx, scenario, args.requests, concurrency)
+            print(f'{mode:>10}  {scenario[0]}', file=sys.stderr)
+
+    report = {
+        'meta': {
+            'database': app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0],
+            'users': args.users,
+            'sitcoms': args.sitcoms,
+            'characters_per_sitcom': args.characters_per_sitcom,
+            'reviews_per_sitcom': args.reviews_per_sitcom,
+            'seed': args.seed,
+            'seed_seconds': round(seed_seconds, 2),
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'cache_backend': app.config['CACHE_BACKEND'],
+            'python': platform.python_version()
+        },
+        'results': results
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['comparison'], regressions = compare(results, json.load(f), args.tolerance)
+        report['regressions'] = regressions
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                f.write(text + '\n')
+    if scratch_dir:
+        with app.app_context():
+            db.engine.dispose()
+        scratch_dir.cleanup()
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
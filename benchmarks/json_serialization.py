@@ -0,0 +1,81 @@
+# benchmarks/json_serialization.py
+"""
+Compares the JSON serialization paths of a 10k-sitcom list
+
+    orm+stdlib   ORM objects, to_dict() and Flask's stdlib json provider (the original path)
+    orm+orjson   ORM objects, to_dict() and the orjson provider
+    rows+stdlib  column tuples through RowSerializer and the stdlib provider
+    rows+orjson  column tuples through RowSerializer and the orjson provider (the list routes' path)
+
+Each variant is timed for query + serialization and for serialization alone.
+
+Usage:
+    python benchmarks/json_serialization.py --sitcoms 10000 --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def timed(function, repeat):
+    """
+    Median wall time of 'repeat' calls, in milliseconds
+    """
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(durations), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sitcoms', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    from app import create_app, db
+    from app.models.sitcom import Sitcom
+    from app.utils.fields import RowSerializer
+    from app.utils.json_provider import PROVIDERS, orjson
+    from app.utils.seed import seed_catalog
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        seed_catalog(100, args.sitcoms, 0, 0)
+
+    def load_objects():
+        db.session.expunge_all() # Measure a cold identity map, as in a request
+        return [sitcom.to_dict() for sitcom in Sitcom.query.order_by(Sitcom.id)]
+
+    def load_rows():
+        serializer = RowSerializer(Sitcom)
+        return [serializer(row) for row in db.session.query(*serializer.columns).order_by(Sitcom.id)]
+
+    results = {}
+    with app.test_request_context():
+        for provider_name in ('stdlib', 'orjson'):
+            if provider_name == 'orjson' and orjson is None:
+                continue
+            provider = PROVIDERS[provider_name](app)
+            for source_name, load in (('orm', load_objects), ('rows', load_rows)):
+                items = load()
+                results[f'{source_name}+{provider_name}'] = {
+                    'query_and_serialize_ms': timed(lambda: provider.response({'items': load()}).get_data(), args.repeat),
+                    'serialize_only_ms': timed(lambda: provider.response({'items': items}).get_data(), args.repeat)
+                }
+
+    print(json.dumps({'sitcoms': args.sitcoms, 'repeat': args.repeat, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/login_throughput.py
+"""
+Measures POST /api/auth/login throughput at several password hashing cost settings
+
+Usage:
+    python benchmarks/login_throughput.py --methods pbkdf2:sha256:600000,scrypt:32768:8:1 --requests 200 --concurrency 8
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Benchmark against a throwaway in-memory database unless told otherwise
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+# Measure the hashing pool itself, not the admission limits and rate limits in front of it
+os.environ.setdefault('ADMISSION_ENABLED', 'false')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_METHODS = 'pbkdf2:sha256:100000,pbkdf2:sha256:600000,scrypt:16384:8:1,scrypt:32768:8:1'
+
+
+def run_method(method, requests, concurrency, workers, queue_depth):
+    """
+    Registers one user hashed with 'method' and logs in 'requests' times from 'concurrency' threads
+    """
+    from app import create_app, db
+    from app.utils.hashing import password_hasher
+
+    app = create_app()
+    app.config.update(PASSWORD_HASH_METHOD=method, PASSWORD_HASH_WORKERS=workers, PASSWORD_HASH_QUEUE_DEPTH=queue_depth)
+    password_hasher.init_app(app) # Rebuild the pool with the settings above
+    with app.app_context():
+        db.create_all()
+
+    credentials = {'username': 'bench', 'email': 'bench@example.com', 'password': 'correct horse battery staple'}
+    app.test_client().post('/api/auth/register', json=credentials)
+
+    def login(_):
+        client = app.test_client()
+        started = time.perf_counter()
+        status = client.post('/api/auth/login', json=credentials).status_code
+        return status, time.perf_counter() - started
+
+    login(None) # Warm up the worker processes
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(login, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(duration for status, duration in results if status == 200)
+    return {
+        'method': method,
+        'requests': requests,
+        'succeeded': len(latencies),
+        'rejected_503': sum(1 for status, _ in results if status == 503),
+        'rejected_429': sum(1 for status, _ in results if status == 429),
+        'logins_per_second': round(len(latencies) / elapsed, 2),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2) if latencies else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--methods', default=DEFAULT_METHODS, help='Comma-separated Werkzeug hash methods')
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='PASSWORD_HASH_WORKERS')
+    parser.add_argument('--queue-depth', type=int, default=1000, help='PASSWORD_HASH_QUEUE_DEPTH')
+    args = parser.parse_args()
+
+    results = [
+        run_method(method.strip(), args.requests, args.concurrency, args.workers, args.queue_depth)
+        for method in args.methods.split(',')
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
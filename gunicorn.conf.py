@@ -0,0 +1,26 @@
+# gunicorn.conf.py
+# Preforking production server: gunicorn -c gunicorn.conf.py wsgi:app
+import multiprocessing
+import os
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+
+# Worker processes and threads per worker; keep DB_POOL_SIZE >= threads so requests never wait on the pool
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+# Seconds an idle keep-alive connection stays open (keep it above the load balancer's idle timeout)
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# Recycle workers after this many requests (0 = never), with jitter so they do not restart together
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 0))
+
+# Every worker imports wsgi.py itself, so its pool connections and hashing processes are its own
+# and are warmed up before it accepts connections (a preloaded app would share them across forks)
+preload_app = False
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
@@ -1,20 +1,13 @@
 # run.py
-from app import create_app, db
-from app.models.user import User
-from app.models.sitcom import Sitcom
-from app.models.character import Character
-from app.models.review import Review
+# Development server only; in production serve wsgi:app with gunicorn (see gunicorn.conf.py)
+# The schema is no longer created on import: run 'flask --app run init-db' once
+from app import create_app
 
 # Create the Flask app instance
 app = create_app()
 
-# Ensure that database tables are created when the app starts
-with app.app_context():
-    # Connect to MySQL to create tables for the model
-    db.create_all()
-
 
 if __name__ == '__main__':
     # Run the Flask development server
     # Enable auto-reloading and a debugger with debug=True
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
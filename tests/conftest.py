@@ -0,0 +1,40 @@
+# tests/conftest.py
+import os
+import tempfile
+import pytest
+
+# Config reads the environment when it is imported: point the app at a throwaway SQLite file (never the .env
+# database) and turn off what would make query counts vary between runs (response cache, purge list reloads)
+os.environ.update({
+    'DATABASE_URL': 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='sitcomverse-tests-'), 'test.db'),
+    'JWT_SECRET_KEY': 'test-secret',
+    'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+    'PASSWORD_HASH_WORKERS': '0',
+    'CACHE_BACKEND': 'null',
+    'ADMISSION_ENABLED': 'false',
+    'RATE_LIMITS': '',
+    'RATE_LIMIT_DEFAULT': '',
+    'PURGE_PENDING_TTL': '3600',
+    'WARMUP_CONNECTIONS': '1'
+})
+
+from app import create_app, db
+from app.utils.seed import seed_catalog
+
+
+@pytest.fixture(scope='session')
+def app():
+    """
+    The application over a freshly created and seeded SQLite database, shared by every test
+    """
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        seed_catalog(50, 200, 5, 10)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,49 @@
+# tests/test_query_budgets.py
+import pytest
+from app import db
+from app.utils.query_plans import hot_path_samples
+from app.utils.sql_instrumentation import record_queries
+
+
+# (path, most statements per request); each path is requested with a small and a large page ({n} items or IDs),
+# and both must stay within the budget: a query per row would grow with the page
+QUERY_BUDGETS = [
+    ('/api/sitcoms?limit={n}', 1),
+    ('/api/sitcoms?genre={genre}&sort=-average_rating&limit={n}', 1),
+    ('/api/sitcoms?limit={n}&include=characters', 2),
+    ('/api/sitcoms?limit={n}&include=characters,reviews', 3),
+    ('/api/sitcoms?ids={ids}', 1),
+    ('/api/sitcoms?ids={ids}&include=characters,reviews', 3),
+    ('/api/sitcoms/{sitcom_id}', 1),
+    ('/api/sitcoms/{sitcom_id}?include=characters,reviews', 3),
+    ('/api/sitcoms/{character_sitcom_id}/characters?limit={n}', 2),
+    ('/api/sitcoms/{character_sitcom_id}/characters/{character_id}', 2),
+    ('/api/characters?ids={ids}', 1),
+    ('/api/sitcoms/{sitcom_id}/reviews?limit={n}', 2),
+    ('/api/sitcoms/{sitcom_id}/reviews/{review_id}', 2)
+]
+
+
+@pytest.fixture(scope='module')
+def samples(app):
+    with app.app_context():
+        samples = hot_path_samples()
+    # Load the once-per-process state (e.g. the list of sitcoms being purged) before anything is counted
+    app.test_client().get('/api/sitcoms?limit=1')
+    return samples
+
+
+@pytest.fixture
+def engine(app):
+    with app.app_context():
+        return db.engine
+
+
+@pytest.mark.parametrize('path, budget', QUERY_BUDGETS, ids=[path for path, budget in QUERY_BUDGETS])
+@pytest.mark.parametrize('page_size', [2, 50])
+def test_query_budget(client, engine, samples, path, budget, page_size):
+    ids = ','.join(str(sitcom_id) for sitcom_id in range(1, page_size + 1))
+    with record_queries(engine) as statements:
+        response = client.get(path.format(n=page_size, ids=ids, **samples))
+    assert response.status_code == 200
+    assert len(statements) <= budget, '\n\n'.join(statements)
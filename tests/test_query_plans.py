@@ -0,0 +1,32 @@
+# tests/test_query_plans.py
+import pytest
+from app import db
+from app.utils.query_plans import HOT_PATHS, hot_path_samples, hot_path_scans
+
+
+@pytest.fixture(scope='module')
+def samples(app):
+    with app.app_context():
+        return hot_path_samples()
+
+
+@pytest.mark.parametrize('hot_path', HOT_PATHS, ids=[hot_path[0] for hot_path in HOT_PATHS])
+def test_hot_path_uses_indexes(app, client, samples, hot_path):
+    with app.app_context():
+        assert hot_path_scans(client, hot_path, samples) == []
+
+
+def test_missing_index_is_reported(app, client, samples):
+    # The check itself must catch a regression: without its index the character list scans the table
+    hot_path = next(hot_path for hot_path in HOT_PATHS if hot_path[0] == 'GET /api/sitcoms/<id>/characters')
+    index = next(index for index in db.metadata.tables['characters'].indexes if index.name == 'ix_characters_sitcom_id_id')
+    with app.app_context():
+        # Pooled SQLite connections keep their prepared EXPLAINs, which a schema change does not invalidate
+        index.drop(db.engine)
+        db.engine.dispose()
+        try:
+            scans = hot_path_scans(client, hot_path, samples)
+        finally:
+            index.create(db.engine)
+            db.engine.dispose()
+    assert [table for table, detail in scans] == ['characters']
@@ -0,0 +1,23 @@
+# wsgi.py
+# Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+# Unlike run.py this never touches the schema; create it once with 'flask --app wsgi init-db'
+import logging
+import time
+
+_started = time.perf_counter()
+
+from app import create_app
+from app.utils.warmup import warm_up
+
+app = create_app()
+
+# Under gunicorn, log through its handlers and level (gunicorn.conf.py) so app logs land next to its own
+gunicorn_logger = logging.getLogger('gunicorn.error')
+if gunicorn_logger.handlers:
+    app.logger.handlers = gunicorn_logger.handlers
+    app.logger.setLevel(gunicorn_logger.level)
+
+# Open pool connections and start the hashing workers before the worker accepts traffic
+startup = warm_up(app, started=_started)
+app.logger.info("Worker ready in %s ms (boot %s ms, warm-up %s ms)",
+                startup['total_ms'], startup['boot_ms'], startup['warmup_ms'])